@@ -0,0 +1,251 @@
+"""Per-answer event log and the analytics computed from it.
+
+Every answered question becomes one row in ``answer_events``: word set, game
+mode, item (the question's ``id``: a word, a letter or a legacy entry id),
+chosen index, correctness, time to answer and timestamp. Strings are stored
+once in ``answer_keys`` and referenced by integer, so an event is seven small
+integers and millions of them stay compact. Events are buffered by an
+:class:`AnswerWriter` and appended in one transaction per batch.
+
+:func:`answer_summary` lets SQLite reduce a word set's events to per-item
+counts and a histogram of answer times, both served from covering indexes, and
+derives per-word error rates, per-letter accuracy and exact time-to-answer
+percentiles from those with numpy, so a summary over a million events moves a
+few thousand rows rather than a million.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .models import AnswerEvent, AnswerKey, WordEntry
+from .settings import settings
+from .trials import TrialWriter
+
+# Stored as the index into this tuple: only ever append to it
+MODES = ("next", "next-images", "first-letter", "inverse-first-letter", "next-hard")
+PERCENTILES = (50, 90, 99)
+# keys per IN (...) / multi-row INSERT, below SQLite's bound-parameter limit
+CHUNK_SIZE = 5000
+
+# (wordset_id, mode code, item_id, chosen, correct, latency_ms, answered_at)
+AnswerRow = Tuple[str, int, str, int, int, int, int]
+
+
+def new_answer_rows(answers: Iterable) -> List[AnswerRow]:
+    """Buffer rows for objects with the fields of ``schemas.AnswerCreate``."""
+    now = int(time.time())
+    return [
+        (a.wordset_id, MODES.index(a.mode), a.item_id, a.chosen_index, int(a.correct), a.latency_ms, now)
+        for a in answers
+    ]
+
+
+class KeyCodes:
+    """Process-wide LRU cache of ``answer_keys`` ids, holding up to ``size`` keys."""
+
+    def __init__(self, size: int = 100_000):
+        self.size = size
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, values: Iterable[str]) -> Dict[str, int]:
+        codes = {}
+        with self._lock:
+            for v in values:
+                code = self._ids.get(v)
+                if code is not None:
+                    self._ids.move_to_end(v)
+                    codes[v] = code
+        return codes
+
+    def lookup(self, db: Session, value: str) -> Optional[int]:
+        code = self._cached([value]).get(value)
+        if code is None:
+            code = db.execute(select(AnswerKey.id).where(AnswerKey.value == value)).scalar()
+            if code is not None:
+                self.remember({value: code})
+        return code
+
+    def assign(self, db: Session, values: Iterable[str]) -> Dict[str, int]:
+        """Ids for ``values``, inserting new keys; does not commit.
+
+        New ids are returned but only cached by :meth:`remember` once the
+        transaction that created them has committed.
+        """
+        codes = self._cached(values)
+        missing = list({v for v in values if v not in codes})
+        for i in range(0, len(missing), CHUNK_SIZE):
+            chunk = missing[i : i + CHUNK_SIZE]
+            db.execute(
+                insert(AnswerKey)
+                .values([{"value": v} for v in chunk])
+                .on_conflict_do_nothing(index_elements=[AnswerKey.value])
+            )
+            rows = db.execute(select(AnswerKey.value, AnswerKey.id).where(AnswerKey.value.in_(chunk)))
+            codes.update(dict(rows.all()))
+        return codes
+
+    def remember(self, codes: Dict[str, int]) -> None:
+        with self._lock:
+            for v, code in codes.items():
+                self._ids[v] = code
+                self._ids.move_to_end(v)
+            while len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+
+
+key_codes = KeyCodes(settings.answer_key_cache_size)
+
+
+def write_answers(db: Session, rows: List[AnswerRow]) -> None:
+    """Append ``rows`` to ``answer_events`` in a single transaction."""
+    if not rows:
+        return
+    try:
+        codes = key_codes.assign(db, [r[0] for r in rows] + [r[2] for r in rows])
+        db.execute(
+            insert(AnswerEvent),
+            [
+                {
+                    "wordset": codes[wordset_id],
+                    "mode": mode,
+                    "item": codes[item_id],
+                    "chosen": chosen,
+                    "correct": correct,
+                    "latency_ms": latency_ms,
+                    "answered_at": answered_at,
+                }
+                for wordset_id, mode, item_id, chosen, correct, latency_ms, answered_at in rows
+            ],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    key_codes.remember(codes)
+
+
+class AnswerWriter(TrialWriter):
+    """Buffers answer rows and appends them to ``answer_events`` in batches."""
+
+    thread_name = "answer-writer"
+
+    def write(self, db: Session, rows: List[AnswerRow]) -> None:
+        write_answers(db, rows)
+
+
+answer_writer = AnswerWriter(
+    flush_size=settings.answer_flush_size,
+    flush_interval=settings.answer_flush_interval,
+    max_buffer=settings.answer_buffer_limit,
+)
+
+
+def record_answers(db: Session, rows: List[AnswerRow]) -> None:
+    """Queue ``rows`` on the running writer, or write them right away (also while its queue is full)."""
+    if answer_writer.running and answer_writer.submit(rows):
+        return
+    write_answers(db, rows)
+
+
+def weighted_percentiles(values: np.ndarray, counts: np.ndarray, qs) -> np.ndarray:
+    """``np.percentile`` (linear interpolation) of data given as sorted distinct values and counts."""
+    cum = np.cumsum(counts)
+    pos = (cum[-1] - 1) * np.asarray(qs, dtype=float) / 100
+    lo = np.floor(pos)
+    # the k-th smallest element (0-based) sits in the first bucket whose cumulative count exceeds k
+    below = values[np.searchsorted(cum, lo, side="right")]
+    above = values[np.searchsorted(cum, np.ceil(pos), side="right")]
+    return below + (above - below) * (pos - lo)
+
+
+def _item_names(db: Session, codes: List[int]) -> Dict[int, str]:
+    """Words for item codes; legacy entry ids are resolved to their correct word."""
+    names: Dict[int, str] = {}
+    for i in range(0, len(codes), CHUNK_SIZE):
+        chunk = codes[i : i + CHUNK_SIZE]
+        values = dict(db.execute(select(AnswerKey.id, AnswerKey.value).where(AnswerKey.id.in_(chunk))).all())
+        words = dict(
+            db.execute(
+                select(WordEntry.id, WordEntry.correct_word).where(WordEntry.id.in_(list(values.values())))
+            ).all()
+        )
+        names.update((code, words.get(value, value)) for code, value in values.items())
+    return names
+
+
+def answer_summary(db: Session, wordset_id: str, since: Optional[int] = None, limit: int = 20) -> dict:
+    """Accuracy, latency percentiles, hardest words and per-letter accuracy of a word set.
+
+    ``since`` (unix seconds) restricts the window; ``limit`` caps the word list,
+    which is sorted by error rate, then by number of answers.
+    """
+    empty = {"total": 0, "accuracy": 0.0, "latency_ms": {f"p{q}": 0.0 for q in PERCENTILES}, "words": [], "letters": []}
+    wordset = key_codes.lookup(db, wordset_id)
+    if wordset is None:
+        return empty
+    where = [AnswerEvent.wordset == wordset]
+    if since is not None:
+        where.append(AnswerEvent.answered_at >= since)
+
+    # per item: answers and errors (a covering-index scan without a window)
+    rows = db.execute(
+        select(AnswerEvent.item, func.count(), func.sum(AnswerEvent.correct)).where(*where).group_by(AnswerEvent.item)
+    ).all()
+    if not rows:
+        return empty
+    per_item = np.array([tuple(r) for r in rows], dtype=np.int64)
+    codes, answers = per_item[:, 0], per_item[:, 1]
+    errors = answers - per_item[:, 2]
+    # time to answer as a histogram of distinct values
+    hist = db.execute(
+        select(AnswerEvent.latency_ms, func.count())
+        .where(*where)
+        .group_by(AnswerEvent.latency_ms)
+        # weighted_percentiles needs the values sorted
+        .order_by(AnswerEvent.latency_ms)
+    ).all()
+    hist = np.array([tuple(r) for r in hist], dtype=np.int64)
+
+    total = int(answers.sum())
+    summary = {
+        "total": total,
+        "accuracy": float(1 - errors.sum() / total),
+        "latency_ms": {
+            f"p{q}": float(v) for q, v in zip(PERCENTILES, weighted_percentiles(hist[:, 0], hist[:, 1], PERCENTILES))
+        },
+    }
+
+    names = _item_names(db, codes.tolist())
+    rate = errors / answers
+    order = np.lexsort((-answers, -rate))[:limit]
+    summary["words"] = [
+        {
+            "item": names.get(int(codes[i]), ""),
+            "answers": int(answers[i]),
+            "errors": int(errors[i]),
+            "error_rate": float(rate[i]),
+        }
+        for i in order
+    ]
+
+    # per letter: fold the per-item counts by the item's first letter
+    letters = np.array([(names.get(int(c)) or "?")[0].upper() for c in codes])
+    keys, letter_idx = np.unique(letters, return_inverse=True)
+    letter_answers = np.bincount(letter_idx, weights=answers)
+    letter_errors = np.bincount(letter_idx, weights=errors)
+    summary["letters"] = [
+        {
+            "letter": str(letter),
+            "answers": int(n),
+            "accuracy": float(1 - e / n),
+        }
+        for letter, n, e in zip(keys, letter_answers, letter_errors)
+    ]
+    return summary
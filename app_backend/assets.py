@@ -0,0 +1,309 @@
+"""Content-hashed asset URLs, immutable caching and precompressed variants.
+
+Question payloads refer to images by a content-hashed name such as
+``Katze.3fa2b1c9d0e1f2a3.jpg``. :class:`AssetStaticFiles` maps such a name
+back to the real file and, if the hash still matches its content, serves it
+with ``Cache-Control: immutable`` and a strong ETag, so browsers never
+revalidate it. A stale hash still serves the current file, just without the
+long-lived headers.
+
+For compressible files, a ``.br``/``.gz`` sibling written by
+``python -m app_backend.assets`` is served when the client accepts it and the
+sibling is not older than the file.
+
+The same command writes the asset manifest (``settings.asset_manifest_file``):
+per image its stem, file, content hash, byte size, pixel size and a tiny
+blurred placeholder. The catalog loads it instead of scanning and hashing the
+images folder while it is current, question payloads carry the pixel size and
+placeholder so the browser can reserve space before an image arrives, and
+``frontend/scripts/generate-manifest.mjs`` builds its image list from it.
+Pixel sizes and placeholders need Pillow; without it they are left out.
+"""
+import base64
+import io
+import json
+import logging
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from .blobs import blob_digest
+from .settings import settings
+from .utils import content_hash
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HASHED_NAME = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{16})(?P<suffix>\.[^.]+)$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE = {".svg", ".json", ".txt", ".css", ".js", ".html", ".xml"}
+# preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+MANIFEST_VERSION = 1
+EXIF_ORIENTATION = 0x0112
+
+
+def hashed_name(name: str, digest: str) -> str:
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}.{digest}{suffix}"
+
+
+def asset_name(root: Path, relpath: str) -> str:
+    """``relpath`` with its file name replaced by the content-hashed name.
+
+    Returns ``relpath`` unchanged if hashed URLs are disabled, the file is
+    missing or it is a blob (whose name already is its hash).
+    """
+    if not settings.hashed_urls or blob_digest(relpath):
+        return relpath
+    try:
+        digest = content_hash(root / relpath)
+    except OSError:
+        return relpath
+    head, name = os.path.split(relpath)
+    return os.path.join(head, hashed_name(name, digest)) if head else hashed_name(name, digest)
+
+
+def resolve_hashed(root: Path, relpath: str) -> Tuple[str, Optional[str]]:
+    """Map a possibly hashed ``relpath`` to ``(real relpath, digest)``.
+
+    ``digest`` is None unless the name carried a hash that matches the file.
+    """
+    head, name = os.path.split(relpath)
+    m = HASHED_NAME.match(name)
+    expected = blob_digest(relpath)
+    if expected:
+        real = relpath
+    elif m:
+        real = os.path.join(head, m["stem"] + m["suffix"])
+        expected = m["hash"]
+    else:
+        return relpath, None
+    full = (root / real).resolve()
+    if not full.is_relative_to(root.resolve()):
+        return relpath, None
+    try:
+        digest = content_hash(full)
+    except OSError:
+        return relpath, None
+    return real, digest if digest == expected else None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header value lists ``etag`` (weak comparison)."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def precompressed(root: Path, relpath: str, accepted: str) -> Tuple[str, Optional[str]]:
+    """``(relpath to serve, content encoding)``: a current compressed sibling if accepted."""
+    try:
+        mtime = (root / relpath).stat().st_mtime_ns
+    except OSError:
+        return relpath, None
+    for enc, ext in ENCODINGS:
+        if enc not in accepted:
+            continue
+        try:
+            st = (root / (relpath + ext)).stat()
+        except OSError:
+            continue
+        # an older sibling was compressed from a previous version of the file
+        if st.st_mtime_ns >= mtime:
+            return relpath + ext, enc
+    return relpath, None
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles that understands content-hashed names and precompressed siblings."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        root = Path(self.directory)
+        real, digest = await anyio.to_thread.run_sync(resolve_hashed, root, path)
+        request_headers = Headers(scope=scope)
+        etag = f'"{digest}"' if digest else None
+        if etag and etag_matches(request_headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE})
+
+        served, encoding = real, None
+        if os.path.splitext(real)[1].lower() in COMPRESSIBLE:
+            accepted = request_headers.get("accept-encoding", "")
+            served, encoding = await anyio.to_thread.run_sync(precompressed, root, real, accepted)
+
+        response = await super().get_response(served, scope)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Content-Type"] = mimetypes.guess_type(real)[0] or "application/octet-stream"
+        if os.path.splitext(real)[1].lower() in COMPRESSIBLE:
+            response.headers["Vary"] = "Accept-Encoding"
+        if etag:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+def question_images(questions: Iterable) -> List[str]:
+    """Every image URL the questions refer to, deduplicated in first-seen order."""
+    urls: Dict[str, None] = {}
+    for q in questions:
+        image_path = q.get("image_path")
+        if image_path:
+            urls[image_path] = None
+        for url in q.get("image_choices", ()):
+            urls[url] = None
+    return list(urls)
+
+
+def preload_links(urls: Iterable[str]) -> str:
+    """``Link`` header value asking the browser to fetch ``urls`` right away."""
+    # headers are latin-1: percent-encode names such as Bär.jpg
+    return ", ".join(f"<{quote(url, safe='/:')}>; rel=preload; as=image" for url in urls)
+
+
+def placeholder(img, size: int) -> str:
+    """``data:`` URL of ``img`` shrunk to at most ``size`` pixels per side."""
+    # JPEG: let the decoder downscale instead of decoding every pixel
+    img.draft("RGB", (size, size))
+    img = ImageOps.exif_transpose(img)
+    alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    img = img.convert("RGBA" if alpha else "RGB")
+    img.thumbnail((size, size))
+    buf = io.BytesIO()
+    if features.check("webp"):
+        fmt = "webp"
+        img.save(buf, fmt, quality=40)
+    else:
+        fmt = "png"
+        img.save(buf, fmt, optimize=True)
+    return f"data:image/{fmt};base64,{base64.b64encode(buf.getvalue()).decode()}"
+
+
+def image_info(path: Path) -> Dict[str, object]:
+    """Displayed pixel size and placeholder of an image, or ``{}`` if it cannot be read."""
+    if Image is None:
+        return {}
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            if img.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                # browsers apply the EXIF rotation, so report the rotated size
+                width, height = height, width
+            info: Dict[str, object] = {"width": width, "height": height}
+            if settings.placeholder_size > 0:
+                info["placeholder"] = placeholder(img, settings.placeholder_size)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read image %s: %s", path, e)
+        return {}
+    return info
+
+
+def manifest_entry(root: Path, fname: str, stem: str, previous: Optional[dict] = None, inspect: bool = True) -> dict:
+    """Manifest entry for ``root / fname``.
+
+    The pixel size and placeholder are taken from ``previous`` if the content
+    hash is unchanged, otherwise read from the file when ``inspect`` is set.
+    """
+    path = root / fname
+    st = path.stat()
+    digest = content_hash(path)
+    entry = {
+        "stem": stem,
+        "file": fname,
+        "hashed": asset_name(root, fname),
+        "hash": digest,
+        "bytes": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    if previous is not None and previous.get("hash") == digest and "width" in previous:
+        for key in ("width", "height", "placeholder"):
+            if key in previous:
+                entry[key] = previous[key]
+    elif inspect:
+        entry.update(image_info(path))
+    return entry
+
+
+def build_manifest(snapshot, previous: Optional[Dict[str, dict]] = None, inspect: bool = True) -> dict:
+    """Asset manifest for a catalog snapshot.
+
+    ``previous`` maps file names to entries of an earlier manifest whose pixel
+    sizes and placeholders are reused for unchanged files.
+    """
+    previous = previous or {}
+    images = []
+    for fname, stem in snapshot.items:
+        try:
+            images.append(manifest_entry(snapshot.directory, fname, stem, previous.get(fname), inspect))
+        except OSError:
+            # removed since the scan
+            continue
+    return {"version": MANIFEST_VERSION, "mtime": snapshot.mtime, "count": len(images), "images": images}
+
+
+def read_manifest(path: Path) -> Optional[dict]:
+    """The manifest in ``path``, or None if it is missing, unreadable or outdated."""
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(path: Path, manifest: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+    os.replace(tmp, path)
+
+
+def precompress(directory: Path) -> int:
+    """Write ``.gz`` (and ``.br`` if brotli is installed) siblings of compressible files."""
+    import gzip
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    count = 0
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE:
+            continue
+        data = path.read_bytes()
+        (path.parent / (path.name + ".gz")).write_bytes(gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            (path.parent / (path.name + ".br")).write_bytes(brotli.compress(data))
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    from .catalog import CatalogSnapshot, scan_images
+
+    images_dir = settings.images_dir
+    out = settings.asset_manifest_file or settings.static_dir / "asset-manifest.json"
+    # always a fresh scan: the catalog itself would load the manifest being rebuilt
+    snapshot = CatalogSnapshot(scan_images(images_dir), images_dir.stat().st_mtime, images_dir)
+    old = read_manifest(out) or {}
+    manifest = build_manifest(snapshot, {e["file"]: e for e in old.get("images", ())})
+    write_manifest(out, manifest)
+    count = precompress(settings.static_dir)
+    sized = sum("width" in e for e in manifest["images"])
+    print(f"Wrote {out} ({manifest['count']} images, {sized} with sizes), precompressed {count} files")
@@ -0,0 +1,16 @@
+"""One-time backfill of the wordset_stats summary table from trial_results.
+
+Run after upgrading an existing database: python -m app_backend.backfill_stats
+"""
+from .db import engine, SessionLocal
+from .migrate import migrate
+from .stats import rebuild_stats
+
+migrate(engine)
+
+db = SessionLocal()
+try:
+    count = rebuild_stats(db)
+    print(f"Rebuilt wordset_stats from {count} trial results.")
+finally:
+    db.close()
@@ -0,0 +1,122 @@
+"""Content-addressed store for word-set images.
+
+Images loaded by ``cli/words.py`` are stored once under
+``static/blobs/<ab>/<hash><ext>``, where ``hash`` is the file's content hash
+(see ``utils.content_hash``) and ``ab`` its first two digits, and
+``WordEntry.image_path`` points at that path. Loading the same picture again,
+in the same or another set, reuses the existing blob, and every set shares one
+immutable URL per picture. Blobs are private copies (or copy-on-write clones),
+never hard links, so editing a source file later cannot change the bytes
+served under its hash.
+
+Blobs that no entry references any more are removed by :func:`collect_garbage`
+(run by ``cli/words.py delete`` and ``gc``).
+"""
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: always copy
+    fcntl = None
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from .models import WordEntry
+from .settings import settings
+from .utils import content_hash
+
+BLOB_DIR = "blobs"
+BLOB_NAME = re.compile(rf"^{BLOB_DIR}/[0-9a-f]{{2}}/(?P<hash>[0-9a-f]{{16}})(?P<suffix>\.[^./]+)$")
+# Linux ioctl sharing a file's extents copy-on-write (btrfs, XFS with reflink=1, ...)
+FICLONE = 0x40049409
+
+
+def blob_relpath(digest: str, suffix: str) -> str:
+    """Path of a blob relative to the static directory."""
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{suffix.lower()}"
+
+
+def blob_digest(relpath: str):
+    """The content hash encoded in a blob path, or None for other paths."""
+    m = BLOB_NAME.match(relpath)
+    return m["hash"] if m else None
+
+
+def clone(src: Path, dst: Path) -> bool:
+    """Make ``dst`` a copy-on-write clone of ``src``; False if the filesystem cannot."""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        return False
+    return True
+
+
+def store(src: Path, root: Path = settings.static_dir, reflink: bool = False) -> str:
+    """Add ``src`` to the blob store (a no-op if it is already there); return its relpath.
+
+    With ``reflink`` the blob is a copy-on-write clone where the filesystem
+    supports it, otherwise a copy.
+    """
+    relpath = blob_relpath(content_hash(src), src.suffix)
+    target = root / relpath
+    try:
+        shared = target.stat().st_nlink > 1
+    except FileNotFoundError:
+        shared = None
+    if shared is False:
+        # refresh the mtime so a concurrent collect_garbage keeps it
+        os.utime(target)
+        return relpath
+    # missing, or hard-linked to its source by an older version: store a private copy
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if not (reflink and clone(src, tmp)):
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return relpath
+
+
+def collect_garbage(conn: Connection, root: Path = settings.static_dir, grace: float = 3600.0) -> Tuple[int, int]:
+    """Delete blobs no ``WordEntry`` refers to; return ``(files, bytes)`` removed.
+
+    Blobs touched within the last ``grace`` seconds are kept, so images stored
+    by an import that has not committed yet survive.
+    """
+    directory = root / BLOB_DIR
+    if not directory.is_dir():
+        return 0, 0
+    referenced = set(
+        conn.execute(
+            select(WordEntry.image_path).where(WordEntry.image_path.like(f"{BLOB_DIR}/%")).distinct()
+        ).scalars()
+    )
+    cutoff = time.time() - grace
+    files = removed = 0
+    for path in directory.glob("*/*"):
+        relpath = path.relative_to(root).as_posix()
+        if relpath in referenced or not path.is_file():
+            continue
+        st = path.stat()
+        if st.st_mtime > cutoff:
+            continue
+        path.unlink(missing_ok=True)
+        files += 1
+        removed += st.st_size
+    for sub in directory.iterdir():
+        if sub.is_dir() and not any(sub.iterdir()):
+            sub.rmdir()
+    return files, removed
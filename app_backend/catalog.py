@@ -0,0 +1,317 @@
+"""In-memory index of the dynamic ``images/`` folder.
+
+The catalog is scanned once at startup and afterwards only rescanned when the
+folder's mtime changes, so the question endpoints never touch the filesystem
+on the request path. If the asset manifest (see assets.py) was written for the
+folder's current mtime, it replaces the scan and also supplies content hashes,
+pixel sizes and placeholders.
+
+With several worker processes, ``catalog_snapshot_file`` makes them share one
+scan: the first worker to see a new folder mtime rescans under a file lock and
+writes the result (including the content hashes) to that file; the others load
+it instead of walking and hashing the folder themselves.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .assets import asset_name, read_manifest
+from .sampling import LetterIndex
+from .settings import settings
+from .similarity import SimilarityIndex
+from .utils import content_hash, file_lock, remember_hash
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# (filename, stem)
+CatalogItem = Tuple[str, str]
+
+
+class CatalogError(Exception):
+    """Raised when the images folder cannot be read."""
+
+
+class CatalogSnapshot:
+    """Immutable view of the images folder at one point in time."""
+
+    def __init__(
+        self,
+        items: List[CatalogItem],
+        mtime: float = 0.0,
+        directory: Optional[Path] = None,
+        entries: Optional[Dict[str, dict]] = None,
+    ):
+        self.items = sorted(items)
+        self.mtime = mtime
+        self.directory = directory
+        # file name -> asset manifest entry
+        self.entries = entries or {}
+        self.filenames = [fname for fname, _ in self.items]
+        self.stems = [stem for _, stem in self.items]
+        self.lengths = [len(stem) for stem in self.stems]
+        self.first_letters = [stem[0].upper() for stem in self.stems]
+
+        by_letter: Dict[str, List[CatalogItem]] = defaultdict(list)
+        by_length: Dict[int, List[CatalogItem]] = defaultdict(list)
+        for item, letter, length in zip(self.items, self.first_letters, self.lengths):
+            by_letter[letter].append(item)
+            by_length[length].append(item)
+        self.by_letter = dict(by_letter)
+        self.by_length = dict(by_length)
+        self.max_length = max(self.lengths, default=0)
+
+        self._words_cache: Dict[int, List[CatalogItem]] = {}
+        self._stems_cache: Dict[int, List[str]] = {}
+        self._stem_sets: Dict[int, FrozenSet[str]] = {}
+        self._asset_names: Dict[str, str] = {}
+        self._image_meta: Dict[str, Optional[dict]] = {}
+        self._letters_cache: Dict[int, Dict[str, List[CatalogItem]]] = {}
+        self._letter_indexes: Dict[Optional[int], LetterIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def words(self, max_len: Optional[int] = None) -> List[CatalogItem]:
+        """Return all items whose stem is at most ``max_len`` characters long."""
+        if max_len is None or max_len >= self.max_length:
+            return self.items
+        cached = self._words_cache.get(max_len)
+        if cached is None:
+            cached = sorted(
+                item
+                for length, bucket in self.by_length.items()
+                if length <= max_len
+                for item in bucket
+            )
+            self._words_cache[max_len] = cached
+        return cached
+
+    def stems_for(self, max_len: Optional[int] = None) -> List[str]:
+        """Return the stems of :meth:`words`."""
+        if max_len is None or max_len >= self.max_length:
+            return self.stems
+        cached = self._stems_cache.get(max_len)
+        if cached is None:
+            cached = [stem for _, stem in self.words(max_len)]
+            self._stems_cache[max_len] = cached
+        return cached
+
+    def stem_set(self, max_len: Optional[int] = None) -> Optional[FrozenSet[str]]:
+        """Return :meth:`stems_for` as a set, or None if ``max_len`` excludes no stem."""
+        if max_len is None or max_len >= self.max_length:
+            return None
+        cached = self._stem_sets.get(max_len)
+        if cached is None:
+            cached = frozenset(self.stems_for(max_len))
+            self._stem_sets[max_len] = cached
+        return cached
+
+    def asset_name(self, fname: str) -> str:
+        """Content-hashed name to use in URLs for ``fname`` (computed once per snapshot)."""
+        name = self._asset_names.get(fname)
+        if name is None:
+            name = asset_name(self.directory, fname) if self.directory else fname
+            self._asset_names[fname] = name
+        return name
+
+    def image_meta(self, fname: str) -> Optional[dict]:
+        """Pixel size and placeholder of ``fname`` from the manifest, if its content is unchanged."""
+        try:
+            return self._image_meta[fname]
+        except KeyError:
+            pass
+        meta = None
+        entry = self.entries.get(fname)
+        if entry is not None and "width" in entry:
+            try:
+                current = content_hash(self.directory / fname)
+            except OSError:
+                current = None
+            if current == entry["hash"]:
+                meta = {"width": entry["width"], "height": entry["height"], "placeholder": entry.get("placeholder")}
+        self._image_meta[fname] = meta
+        return meta
+
+    def letters(self, max_len: Optional[int] = None) -> Dict[str, List[CatalogItem]]:
+        """Return the by-letter buckets restricted to stems of at most ``max_len``."""
+        if max_len is None or max_len >= self.max_length:
+            return self.by_letter
+        cached = self._letters_cache.get(max_len)
+        if cached is None:
+            cached = defaultdict(list)
+            for fname, stem in self.words(max_len):
+                cached[stem[0].upper()].append((fname, stem))
+            cached = dict(cached)
+            self._letters_cache[max_len] = cached
+        return cached
+
+    def letter_index(self, max_len: Optional[int] = None) -> LetterIndex:
+        """Return :meth:`words` sorted by first letter, for O(k) sampling."""
+        if max_len is not None and max_len >= self.max_length:
+            max_len = None
+        index = self._letter_indexes.get(max_len)
+        if index is None:
+            index = LetterIndex(self.words(max_len))
+            self._letter_indexes[max_len] = index
+        return index
+
+
+def scan_images(images_dir: Path) -> List[CatalogItem]:
+    """List ``(filename, stem)`` for every image file directly in ``images_dir``."""
+    return [
+        (p.name, p.stem)
+        for p in images_dir.iterdir()
+        if p.stem and p.suffix.lower() in IMAGE_EXTENSIONS and p.is_file()
+    ]
+
+
+def write_shared_snapshot(path: Path, snapshot: CatalogSnapshot, hashes: bool) -> None:
+    """Write ``snapshot`` (and, if ``hashes``, every file's content hash) to ``path`` atomically."""
+    digests = {}
+    if hashes and snapshot.directory is not None:
+        for fname in snapshot.filenames:
+            file = snapshot.directory / fname
+            try:
+                st = file.stat()
+                digests[fname] = [st.st_mtime_ns, st.st_size, content_hash(file)]
+            except OSError:
+                continue
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "directory": str(snapshot.directory.resolve()) if snapshot.directory else None,
+        "mtime": snapshot.mtime,
+        "items": snapshot.items,
+        "hashes": digests,
+        "entries": snapshot.entries,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def read_shared_snapshot(path: Path, images_dir: Path, mtime: float) -> Optional[CatalogSnapshot]:
+    """Load the snapshot in ``path`` if it describes ``images_dir`` at ``mtime``, else None."""
+    try:
+        payload = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if (
+        payload.get("version") != SNAPSHOT_VERSION
+        or payload.get("directory") != str(images_dir.resolve())
+        or payload.get("mtime") != mtime
+    ):
+        return None
+    for fname, (mtime_ns, size, digest) in payload["hashes"].items():
+        remember_hash(images_dir / fname, mtime_ns, size, digest)
+    return CatalogSnapshot([tuple(item) for item in payload["items"]], mtime, images_dir, payload["entries"])
+
+
+def read_manifest_snapshot(path: Path, images_dir: Path, mtime: float) -> Optional[CatalogSnapshot]:
+    """Snapshot from the asset manifest in ``path`` if it was built at ``mtime``, else None."""
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("mtime") != mtime:
+        return None
+    entries = {}
+    for entry in manifest["images"]:
+        remember_hash(images_dir / entry["file"], entry["mtime_ns"], entry["bytes"], entry["hash"])
+        entries[entry["file"]] = entry
+    items = [(entry["file"], entry["stem"]) for entry in manifest["images"]]
+    return CatalogSnapshot(items, mtime, images_dir, entries)
+
+
+class ImageCatalog:
+    """Caches a :class:`CatalogSnapshot` and refreshes it when the folder changes.
+
+    The folder mtime is checked at most once every ``refresh_interval`` seconds.
+    ``similarity`` is kept in sync with the current stems across refreshes.
+    If ``snapshot_file`` is set, scans are shared with other processes through it.
+    A current ``manifest_file`` is loaded instead of scanning.
+    """
+
+    def __init__(
+        self,
+        images_dir: Path,
+        refresh_interval: float = 2.0,
+        snapshot_file: Optional[Path] = None,
+        manifest_file: Optional[Path] = None,
+    ):
+        self.images_dir = images_dir
+        self.refresh_interval = refresh_interval
+        self.snapshot_file = snapshot_file
+        self.manifest_file = manifest_file
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.similarity = SimilarityIndex()
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return snapshot
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> CatalogSnapshot:
+        with self._lock:
+            try:
+                mtime = self.images_dir.stat().st_mtime
+                snapshot = self._snapshot
+                if force or snapshot is None or snapshot.mtime != mtime:
+                    snapshot = self._load(mtime, force)
+                    self.similarity.sync(snapshot.stems)
+                    self._snapshot = snapshot
+            except OSError as e:
+                raise CatalogError(f"Could not read images folder: {e}") from e
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def _scan(self, mtime: float) -> CatalogSnapshot:
+        if self.manifest_file is not None:
+            snapshot = read_manifest_snapshot(self.manifest_file, self.images_dir, mtime)
+            if snapshot is not None:
+                return snapshot
+            if self.manifest_file.exists():
+                logger.info(
+                    "%s is out of date, scanning %s (run python -m app_backend.assets)",
+                    self.manifest_file,
+                    self.images_dir,
+                )
+        return CatalogSnapshot(scan_images(self.images_dir), mtime, self.images_dir)
+
+    def _load(self, mtime: float, force: bool) -> CatalogSnapshot:
+        path = self.snapshot_file
+        if path is None:
+            return self._scan(mtime)
+        if not force:
+            shared = read_shared_snapshot(path, self.images_dir, mtime)
+            if shared is not None:
+                return shared
+        # without fcntl (Windows) workers may occasionally scan twice
+        with file_lock(path.with_name(path.name + ".lock")):
+            # another worker may have finished the scan while we waited
+            shared = None if force else read_shared_snapshot(path, self.images_dir, mtime)
+            if shared is not None:
+                return shared
+            snapshot = self._scan(mtime)
+            try:
+                write_shared_snapshot(path, snapshot, settings.hashed_urls)
+            except OSError as e:
+                logger.warning("Could not write catalog snapshot %s: %s", path, e)
+            return snapshot
+
+
+catalog = ImageCatalog(
+    settings.images_dir,
+    settings.catalog_refresh_interval,
+    settings.catalog_snapshot_file,
+    settings.asset_manifest_file,
+)
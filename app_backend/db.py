@@ -1,9 +1,94 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .models import Base
 from .settings import settings
 
-engine = create_engine(
-    settings.database_url, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync SQLite URL to its aiosqlite equivalent."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs applied to every new SQLite connection, from settings."""
+    return {
+        # must come before journal_mode: it only takes effect on a new, empty file
+        "auto_vacuum": settings.sqlite_auto_vacuum,
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def engine_kwargs(url: str) -> dict:
+    """Pool and connect arguments for ``create_engine`` based on settings."""
+    kwargs = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if is_sqlite(url):
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        }
+        if ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"):
+            # in-memory databases use a single shared connection pool
+            return kwargs
+    kwargs["pool_size"] = settings.db_pool_size
+    kwargs["max_overflow"] = settings.db_max_overflow
+    return kwargs
+
+
+def configure_engine(engine: Engine) -> Engine:
+    if is_sqlite(str(engine.url)):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def describe_engine(engine: Engine) -> str:
+    """One-line summary of the effective connection settings, for startup logs."""
+    if not is_sqlite(str(engine.url)):
+        return f"database={engine.url.render_as_string(hide_password=True)}"
+    with engine.connect() as conn:
+        values = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in sqlite_pragmas()
+        }
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        values["pool"] = f"QueuePool(size={pool.size()}, max_overflow={settings.db_max_overflow})"
+    else:
+        values["pool"] = type(pool).__name__
+    return " ".join(f"{k}={v}" for k, v in values.items())
+
+
+engine = configure_engine(create_engine(settings.database_url, **engine_kwargs(settings.database_url)))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for settings.async_db (requires aiosqlite); shares the pragmas
+# and pool settings of the sync engine.
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_db:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_url = async_database_url(settings.database_url)
+    async_engine = create_async_engine(async_url, **engine_kwargs(async_url))
+    configure_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
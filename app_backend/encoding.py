@@ -0,0 +1,46 @@
+"""Opt-in fast JSON path for question batches (``settings.fast_json``).
+
+Question endpoints normally return their dicts to FastAPI, which validates
+them against ``response_model`` and encodes them with the stdlib encoder. With
+``fast_json`` they are encoded with orjson (stdlib ``json`` if it is not
+installed) and written out as-is. Pooled questions are encoded once, when the
+pool generates them, so serving a batch only joins pre-built bytes.
+"""
+import json
+from typing import Iterable, List
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class PreEncoded(dict):
+    """A question dict that carries its own JSON encoding."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, question: dict):
+        super().__init__(question)
+        self.json = dumps(question)
+
+
+def pre_encode(batch: Iterable[dict]) -> List[PreEncoded]:
+    return [PreEncoded(q) for q in batch]
+
+
+def encode_batch(batch: Iterable[dict]) -> bytes:
+    """JSON array of ``batch``, reusing the encoding of :class:`PreEncoded` items."""
+    return b"[" + b",".join(q.json if isinstance(q, PreEncoded) else dumps(q) for q in batch) + b"]"
+
+
+def json_response(body: bytes, headers=None) -> Response:
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,77 @@
+"""Print SQLite's EXPLAIN QUERY PLAN for the queries behind each endpoint.
+
+    python -m app_backend.explain
+
+Exits with status 1 if a query that should be index-backed falls back to a full
+table scan, so it can be used as a regression check.
+"""
+import sys
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from .models import TrialResult, WordSetStats
+from .wordset_cache import wordset_query
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+# (label, statement, may_scan) -- may_scan marks queries that read a whole table by design
+QUERIES = [
+    ("list_wordsets: best scores", select(WordSetStats.wordset_id, WordSetStats.best), True),
+    ("get_stats", select(WordSetStats).where(WordSetStats.wordset_id == SAMPLE_ID), False),
+    ("get_next (legacy): wordset with entries", wordset_query(SAMPLE_ID), False),
+    (
+        "best score per wordset",
+        select(TrialResult.wordset_id, func.max(TrialResult.correct)).group_by(TrialResult.wordset_id),
+        False,
+    ),
+    (
+        "best/total for one wordset",
+        select(func.max(TrialResult.correct), func.count()).where(TrialResult.wordset_id == SAMPLE_ID),
+        False,
+    ),
+    (
+        "trial history for one wordset",
+        select(TrialResult).where(TrialResult.wordset_id == SAMPLE_ID).order_by(TrialResult.answered_at),
+        False,
+    ),
+]
+
+
+def query_plans(engine: Engine):
+    """Yield ``(label, sql, plan_lines, full_scan, may_scan)`` for every entry in QUERIES."""
+    with engine.connect() as conn:
+        for label, stmt, may_scan in QUERIES:
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            plan = [row[-1] for row in rows]
+            # scanning a subquery's result (e.g. the LIMIT 1 one of a joined eager load) reads no table
+            subqueries = {line.split()[1] for line in plan if line.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+            full_scan = any(
+                line.startswith("SCAN ")
+                and " USING " not in line
+                and line.split()[1] not in subqueries | {"SUBQUERY"}
+                for line in plan
+            )
+            yield label, sql, plan, full_scan, may_scan
+
+
+def main(engine: Engine) -> int:
+    regressions = 0
+    for label, sql, plan, full_scan, may_scan in query_plans(engine):
+        print(f"== {label}")
+        print("   " + " ".join(sql.split()))
+        for line in plan:
+            print(f"   -> {line}")
+        if full_scan and not may_scan:
+            print("   !! full table scan")
+            regressions += 1
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    from .db import engine
+    from .migrate import migrate
+
+    migrate(engine)
+    sys.exit(main(engine))
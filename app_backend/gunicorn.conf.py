@@ -0,0 +1,47 @@
+"""Gunicorn settings for running the API with several worker processes.
+
+    gunicorn -c app_backend/gunicorn.conf.py app_backend.main:app
+
+The app is imported once in the master (``preload_app``), which checks the
+schema, scans the images folder, hashes the files, builds the similarity index
+and reads the thumbnail LRU before the workers are forked, so they start with
+that state shared copy-on-write instead of rebuilding it each (their lifespan
+finds it done, see startup.py). From then on each worker keeps its own copy
+current. Later rescans go through ``CATALOG_SNAPSHOT_FILE``
+(see catalog.py), and word set changes through the stamp file (see
+wordset_cache.py), so all workers pick them up without rescanning on their own.
+"""
+import gc
+import os
+
+try:
+    import uvicorn_worker  # noqa: F401
+    worker_class = "uvicorn_worker.UvicornWorker"
+except ImportError:
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+wsgi_app = "app_backend.main:app"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+preload_app = True
+os.environ.setdefault("CATALOG_SNAPSHOT_FILE", "data/catalog-snapshot.json")
+
+
+def when_ready(server):
+    from app_backend.startup import ensure_schema, warm_caches
+
+    # once here rather than racing in every worker's lifespan, which then skips it
+    ensure_schema()
+    warm_caches()
+    server.log.info("Catalog and caches warmed before forking")
+    # keep the warmed objects out of the collector so forking does not touch their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # connections opened in the master must not be shared with the children
+    from app_backend.db import async_engine, engine
+
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
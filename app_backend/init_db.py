@@ -1,18 +1,15 @@
-from .models import Base
-from .db import engine, SessionLocal
-from sqlalchemy import text
+from .db import engine
+from .migrate import migrate, pending_changes
 
 print("Attempting to create database tables...")
-Base.metadata.create_all(bind=engine)
+created = migrate(engine)
+if created:
+    print(f"Created: {', '.join(created)}")
 print("Database tables creation attempt complete.")
 
-# Optional: Verify connection and a simple query
-try:
-    db = SessionLocal()
-    # Try to query a table to ensure it exists
-    db.execute(text("SELECT 1 FROM word_sets LIMIT 1"))
-    print("Successfully connected to the database and found word_sets table.")
-except Exception as e:
-    print(f"Error during database connection or table check: {e}")
-finally:
-    db.close()
\ No newline at end of file
+# columns that cannot be added to existing tables (non-nullable) are left to the user
+missing = pending_changes(engine)
+if missing:
+    print(f"Still missing after migration: {', '.join(missing)}")
+else:
+    print("Database schema is up to date.")
@@ -1,21 +1,98 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from uuid import uuid4
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from pathlib import Path
+import logging
+import random
 from typing import List, Optional
 
 from .settings import settings
-from .db import SessionLocal, engine
-from .models import Base, WordSet, WordEntry, TrialResult
-from .utils import levenshtein
-from pydantic import BaseModel, ConfigDict
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+from .answers import answer_summary, answer_writer, new_answer_rows, record_answers
+from .assets import (
+    IMMUTABLE,
+    AssetStaticFiles,
+    build_manifest,
+    preload_links,
+    question_images,
+    resolve_hashed,
+)
+from .catalog import catalog, CatalogError
+from .db import AsyncSessionLocal, SessionLocal, async_engine, describe_engine, engine
+from .encoding import dumps, encode_batch, json_response, pre_encode
+from .metrics import MetricsMiddleware, instrument_engine, render as render_metrics
+from .models import WordSet, TrialResult, WordSetStats
+from .schemas import (
+    WordSetWithStats,
+    NextEntry,
+    NextImageEntry,
+    FirstLetterEntry,
+    InverseFirstLetterEntry,
+    SessionBundle,
+    AnswerCreate,
+    AnswerSummary,
+    TrialCreate,
+    TrialResponse,
+    StatsResponse,
+)
+from .question_pool import question_pool
+from .questions import (
+    QuestionError,
+    first_letter_batch,
+    hard_batch,
+    image_batch,
+    inverse_first_letter_batch,
+    legacy_batch,
+    next_batch,
+)
+from .startup import ensure_schema, ready, start_warm_up
+from .trials import ingest, new_trial_rows, trial_writer
+from .thumbnails import derivative_for, thumb_prefix
+from .wordset_cache import wordset_cache
+
+# app_backend.* loggers; uvicorn only configures its own
+_app_logger = logging.getLogger("app_backend")
+_app_logger.setLevel(settings.log_level.upper())
+if not _app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    _app_logger.addHandler(_handler)
+logger = logging.getLogger(__name__)
+
+MAX_SESSION_MODES = 10
+
+if settings.metrics:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("database: %s", describe_engine(engine))
+    # One inspection per start (skipped in workers forked after the gunicorn
+    # master did it); migrations proper live in migrate.py / init_db.py
+    ensure_schema()
+    if settings.trial_write_behind:
+        trial_writer.start()
+    if settings.answer_log:
+        answer_writer.start()
+    question_pool.start()
+    # Catalog, caches and question pool are built in the background; see /api/ready
+    start_warm_up(_warm_up_calls())
+    yield
+    question_pool.stop()
+    # Flush buffered trials and answers before the process exits
+    trial_writer.stop()
+    answer_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if settings.metrics:
+    app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,68 +102,69 @@ app.add_middleware(
 )
 
 app.mount(
-    "/static", StaticFiles(directory=str(settings.static_dir)), name="static"
+    "/static", AssetStaticFiles(directory=str(settings.static_dir)), name="static"
 )
 
 # Serve the raw images directory under /images for dynamic games
 app.mount(
-    "/images", StaticFiles(directory=str(settings.static_dir.parent / "images")), name="images"
+    "/images", AssetStaticFiles(directory=str(settings.images_dir)), name="images"
 )
 
 
-class WordSetMetadata(BaseModel):
-    id: str
-    title: str
-    model_config = ConfigDict(from_attributes=True)
-
-
-class WordSetWithStats(WordSetMetadata):
-    best: int
+def _thumbnail_response(root: Path, relpath: str, bucket: int) -> FileResponse:
+    relpath, digest = resolve_hashed(root, relpath)
+    source = (root / relpath).resolve()
+    if not source.is_relative_to(root.resolve()) or not source.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    if bucket not in settings.thumbnail_sizes:
+        raise HTTPException(status_code=404, detail="Unknown thumbnail size")
+    path, media_type = derivative_for(source, bucket)
+    # content-hashed URLs never change meaning, so they can be cached forever
+    headers = {"Cache-Control": IMMUTABLE if digest else "public, max-age=86400"}
+    if digest:
+        headers["ETag"] = f'"{digest}-{bucket}"'
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 
-class NextEntry(BaseModel):
-    id: str
-    image_path: str
-    choices: List[str]
-    correct_index: int
+# Resized derivatives of /images and /static (see thumbnails.py)
+@app.get("/thumbs/{bucket}/images/{filename}")
+def get_image_thumbnail(bucket: int, filename: str):
+    return _thumbnail_response(settings.images_dir, filename, bucket)
 
 
-class NextImageEntry(BaseModel):
-    id: str
-    word: str
-    image_choices: List[str]
-    correct_index: int
+@app.get("/thumbs/{bucket}/static/{path:path}")
+def get_static_thumbnail(bucket: int, path: str):
+    return _thumbnail_response(settings.static_dir, path, bucket)
 
 
-class FirstLetterEntry(BaseModel):
-    id: str
-    image_path: str
-    choices: List[str]
-    correct_index: int
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Request, database and question-generation timings (Prometheus text format)."""
+    if not settings.metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
-class InverseFirstLetterEntry(BaseModel):
-    id: str
-    letter: str
-    image_choices: List[str]
-    correct_index: int
+@app.get("/api/ready", include_in_schema=False)
+def get_ready():
+    """200 once the startup warm-up has finished, 503 before."""
+    if not ready.is_set():
+        return JSONResponse({"status": "warming up"}, status_code=503)
+    return {"status": "ready"}
 
 
-class TrialCreate(BaseModel):
-    wordset_id: str
-    correct: int
+@app.get("/api/assets/manifest")
+def get_asset_manifest():
+    """The asset manifest of the current catalog (pixel sizes only where the built one has them)."""
+    snapshot = get_catalog()
+    return build_manifest(snapshot, snapshot.entries, inspect=False)
 
 
-class TrialResponse(BaseModel):
-    id: str
-    wordset_id: str
-    correct: int
-    answered_at: datetime
-
-
-class StatsResponse(BaseModel):
-    best: int
-    total: int
+def get_catalog():
+    try:
+        return catalog.get()
+    except CatalogError:
+        raise HTTPException(status_code=500, detail='Could not read images folder')
 
 
 def get_db():
@@ -97,24 +175,21 @@ def get_db():
         db.close()
 
 
-@app.get("/api/wordsets", response_model=List[WordSetWithStats])
-def list_wordsets(db: Session = Depends(get_db)):
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def wordsets_with_stats(db: Session) -> List[WordSetWithStats]:
     # Get all sets from the DB
     db_sets = db.query(WordSet).all()
 
-    # Get all trial results and group by wordset_id to find the max score
-    stats_query = (
-        db.query(
-            TrialResult.wordset_id,
-            func.max(TrialResult.correct).label("best_score"),
-        )
-        .group_by(TrialResult.wordset_id)
-        .all()
-    )
-    
+    # Best scores come from the incrementally maintained wordset_stats table
+    stats_query = db.query(WordSetStats.wordset_id, WordSetStats.best).all()
+
     # Create a dictionary for quick lookup of best scores
     best_scores = {wordset_id: best_score for wordset_id, best_score in stats_query}
-    print(f"[DEBUG] list_wordsets - best_scores: {best_scores}")
+    logger.debug("list_wordsets - best_scores: %s", best_scores)
 
     # Prepare the response list
     response_sets = []
@@ -174,84 +249,160 @@ def list_wordsets(db: Session = Depends(get_db)):
     return response_sets
 
 
+# The DB-bound endpoints below have an async variant (settings.async_db) that
+# runs the same code through AsyncSession.run_sync on the aiosqlite engine, so
+# requests do not hold a threadpool slot while waiting on SQLite.
+if settings.async_db:
+    @app.get("/api/wordsets", response_model=List[WordSetWithStats])
+    async def list_wordsets(db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(wordsets_with_stats)
+else:
+    @app.get("/api/wordsets", response_model=List[WordSetWithStats])
+    def list_wordsets(db: Session = Depends(get_db)):
+        return wordsets_with_stats(db)
+
+
+def _questions(generate):
+    try:
+        return generate()
+    except QuestionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _pooled(key, size: int, snapshot, generate, seed: Optional[str] = None, unique: bool = True):
+    """Serve ``size`` questions for ``key`` from the question pool.
+
+    A ``seed`` makes the batch reproducible: it is generated on the spot from a
+    ``random.Random(seed)``, bypassing the pool.
+    """
+    if settings.fast_json:
+        # encode once at generation time (in the background, for pooled keys)
+        plain = generate
+
+        def generate(n, rng=random):
+            return pre_encode(plain(n, rng))
+
+    if seed is not None:
+        rng = random.Random(seed)
+        return _questions(lambda: generate(size, rng))
+    return _questions(
+        lambda: question_pool.take(key, size, generate, version=snapshot.mtime, unique=unique)
+    )
+
+
+def _next_questions(wordset_id, size, max_len, lev, max_lev, thumb, seed, db):
+    # lev / max_lev bound the edit distance between distractors and the correct word
+    # seed makes the batch reproducible (same seed and parameters, same questions)
+    if lev is not None and max_lev is not None and lev > max_lev:
+        raise HTTPException(status_code=422, detail="lev must not be greater than max_lev")
+    prefix = thumb_prefix(thumb)
+    # Dynamic mode: questions come from the images/ catalog
+    if wordset_id.startswith('dynamic'):
+        snapshot = get_catalog()
+        num_distractors = 1 if wordset_id == 'dynamic-easy' else 3
+        return _pooled(
+            ("next", max_len, num_distractors, lev, max_lev, prefix),
+            size,
+            snapshot,
+            lambda n, rng=random: next_batch(
+                snapshot, n, max_len, num_distractors, lev, max_lev, catalog.similarity, prefix, rng
+            ),
+            seed,
+        )
+
+    # Existing WordSet-backed logic (legacy), served from the in-memory wordset cache
+    ws = wordset_cache.get(db, wordset_id)
+    if not ws:
+        raise HTTPException(status_code=404, detail="WordSet not found")
+    rng = random.Random(seed) if seed is not None else random
+    return _questions(lambda: legacy_batch(ws, size, max_len, lev, max_lev, prefix, rng))
+
+
+def _image_questions(wordset_id, size, max_len, thumb, seed):
+    # Only dynamic-images is supported for image-match
+    if not wordset_id.startswith('dynamic-images'):
+        raise HTTPException(status_code=404, detail='ImageMatch not available for this set')
+    # Dynamic image-match: pick a word and 4 image choices
+    prefix = thumb_prefix(thumb)
+    snapshot = get_catalog()
+    num_distractors = 1 if wordset_id == 'dynamic-images-easy' else 3
+    return _pooled(
+        ("next-images", max_len, num_distractors, prefix),
+        size,
+        snapshot,
+        lambda n, rng=random: image_batch(snapshot, n, max_len, num_distractors, prefix, rng),
+        seed,
+    )
+
+
+def _first_letter_questions(wordset_id, size, thumb, seed):
+    if wordset_id != 'first-letter-match':
+        raise HTTPException(status_code=404, detail='First Letter Match not available for this set')
+
+    prefix = thumb_prefix(thumb)
+    snapshot = get_catalog()
+    return _pooled(
+        ("first-letter", prefix),
+        size,
+        snapshot,
+        lambda n, rng=random: first_letter_batch(snapshot, n, prefix, rng),
+        seed,
+    )
+
+
+def _inverse_first_letter_questions(wordset_id, size, thumb, seed):
+    if wordset_id != 'inverse-first-letter-match':
+        raise HTTPException(status_code=404, detail='Inverse First Letter Match not available for this set')
+
+    prefix = thumb_prefix(thumb)
+    snapshot = get_catalog()
+    # ids are letters here, so a batch may repeat one (as it always could)
+    return _pooled(
+        ("inverse-first-letter", prefix),
+        size,
+        snapshot,
+        lambda n, rng=random: inverse_first_letter_batch(snapshot, n, prefix, rng),
+        seed,
+        unique=False,
+    )
+
+
+def _hard_questions(wordset_id, size, max_len, thumb, seed):
+    if wordset_id != 'dynamic-hard':
+        raise HTTPException(status_code=404, detail='Hard mode not available for this set')
+
+    prefix = thumb_prefix(thumb)
+    snapshot = get_catalog()
+    # hard mode always returns exactly ``size`` questions, repeats included
+    return _pooled(
+        ("next-hard", max_len, prefix),
+        size,
+        snapshot,
+        lambda n, rng=random: hard_batch(snapshot, n, max_len, prefix, rng),
+        seed,
+        unique=False,
+    )
+
+
+def _respond(batch: list):
+    """Return ``batch`` for ``response_model`` validation, or encoded as-is with ``fast_json``."""
+    if settings.fast_json:
+        return json_response(encode_batch(batch))
+    return batch
+
+
 @app.get("/api/wordsets/{wordset_id}/next", response_model=List[NextEntry])
 def get_next(
     wordset_id: str,
     size: int = Query(5, ge=1),
     max_len: Optional[int] = None,
-    lev: Optional[int] = None,
+    lev: Optional[int] = Query(None, ge=0),
+    max_lev: Optional[int] = Query(None, ge=0),
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    # Dynamic mode: scan static/images directory for all image files
-    if wordset_id.startswith('dynamic'):
-        import random
-
-        img_dir = settings.static_dir.parent / 'images'
-        try:
-            files = [p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
-        except Exception:
-            raise HTTPException(status_code=500, detail='Could not read images folder')
-        # derive valid words (stem) filtered by max word length
-        max_len_filter = max_len if max_len is not None else None
-        words = [(p.name, p.stem) for p in files if (max_len_filter is None or len(p.stem) <= max_len_filter)]
-        total = len(words)
-        if total == 0:
-            raise HTTPException(status_code=404, detail='No images available')
-        n = size if size <= total else total
-        selected = random.sample(words, n)
-        batch: List[NextEntry] = []
-        for fname, stem in selected:
-            # pick up to 3 distractors from remaining words
-            pool = [w for f, w in words if w != stem]
-            random.shuffle(pool)
-            num_distractors = 1 if wordset_id == 'dynamic-easy' else 3
-            distractors = pool[:num_distractors]
-            choices = distractors + [stem]
-            random.shuffle(choices)
-            batch.append(
-                NextEntry(
-                    id=stem,
-                    image_path=f"/images/{fname}",
-                    choices=choices,
-                    correct_index=choices.index(stem),
-                )
-            )
-        return batch
-
-    # Existing WordSet-backed logic (legacy)
-    ws = db.query(WordSet).filter(WordSet.id == wordset_id).first()
-    if not ws:
-        raise HTTPException(status_code=404, detail="WordSet not found")
-    entries = db.query(WordEntry).filter(WordEntry.wordset_id == wordset_id).all()
-    if not entries:
-        raise HTTPException(status_code=404, detail="No entries for WordSet")
-    import random
-
-    total = len(entries)
-    if size > total:
-        size = total
-    selected = random.sample(entries, size)
-    max_word_length = max_len if max_len is not None else ws.max_word_length
-    batch: List[NextEntry] = []
-    for entry in selected:
-        original = entry.distractors or []
-        filt = [d for d in original if max_word_length is None or len(d) <= max_word_length]
-        desired = len(original)
-        if len(filt) < desired:
-            pool = [e.correct_word for e in entries if e.correct_word != entry.correct_word and e.correct_word not in filt]
-            random.shuffle(pool)
-            filt.extend(pool[: desired - len(filt)])
-        choices = filt + [entry.correct_word]
-        random.shuffle(choices)
-        batch.append(
-            NextEntry(
-                id=entry.id,
-                image_path=f"/static/{entry.image_path}",
-                choices=choices,
-                correct_index=choices.index(entry.correct_word),
-            )
-        )
-    return batch
+    return _respond(_next_questions(wordset_id, size, max_len, lev, max_lev, thumb, seed, db))
 
 
 @app.get("/api/wordsets/{wordset_id}/next-images", response_model=List[NextImageEntry])
@@ -259,145 +410,33 @@ def get_next_images(
     wordset_id: str,
     size: int = Query(5, ge=1),
     max_len: Optional[int] = None,
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    # Only dynamic-images is supported for image-match
-    if not wordset_id.startswith('dynamic-images'):
-        raise HTTPException(status_code=404, detail='ImageMatch not available for this set')
-    # Dynamic image-match: pick a word and 4 image choices
-    import random
-    img_dir = settings.static_dir.parent / 'images'
-    try:
-        files = [p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
-    except Exception:
-        raise HTTPException(status_code=500, detail='Could not read images folder')
-    # derive valid words (stem) filtered by max word length
-    max_len_filter = max_len if max_len is not None else None
-    items = [(p.name, p.stem) for p in files if max_len_filter is None or len(p.stem) <= max_len_filter]
-    total = len(items)
-    if total == 0:
-        raise HTTPException(status_code=404, detail='No images available for image-match')
-    n = size if size <= total else total
-    selected = random.sample(items, n)
-    batch: List[NextImageEntry] = []
-    for fname, stem in selected:
-        pool = [f for f, w in items if w != stem]
-        random.shuffle(pool)
-        num_distractors = 1 if wordset_id == 'dynamic-images-easy' else 3
-        choices = pool[:num_distractors] + [fname]
-        random.shuffle(choices)
-        batch.append(
-            NextImageEntry(
-                id=stem,
-                word=stem,
-                image_choices=[f"/images/{f}" for f in choices],
-                correct_index=choices.index(fname),
-            )
-        )
-    return batch
+    return _respond(_image_questions(wordset_id, size, max_len, thumb, seed))
 
 
 @app.get("/api/wordsets/{wordset_id}/first-letter", response_model=List[FirstLetterEntry])
 def get_first_letter_batch(
     wordset_id: str,
     size: int = Query(5, ge=1),
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    if wordset_id != 'first-letter-match':
-        raise HTTPException(status_code=404, detail='First Letter Match not available for this set')
-
-    import random
-    import string
-
-    img_dir = settings.static_dir.parent / 'images'
-    try:
-        files = [p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
-    except Exception:
-        raise HTTPException(status_code=500, detail='Could not read images folder')
-
-    items = [(p.name, p.stem) for p in files if p.stem]
-    total = len(items)
-    if total == 0:
-        raise HTTPException(status_code=404, detail='No images available for First Letter Match')
-
-    n = size if size <= total else total
-    selected = random.sample(items, n)
-
-    german_alphabet = list("ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜ")
-
-    batch: List[FirstLetterEntry] = []
-    for fname, stem in selected:
-        correct_first_letter = stem[0].upper()
-        
-        pool = [letter for letter in german_alphabet if letter != correct_first_letter]
-        random.shuffle(pool)
-        
-        distractors = random.sample(pool, 3) # 3 distractors
-        choices = distractors + [correct_first_letter]
-        random.shuffle(choices)
-        
-        batch.append(
-            FirstLetterEntry(
-                id=stem,
-                image_path=f"/images/{fname}",
-                choices=choices,
-                correct_index=choices.index(correct_first_letter),
-            )
-        )
-    return batch
+    return _respond(_first_letter_questions(wordset_id, size, thumb, seed))
 
 
 @app.get("/api/wordsets/{wordset_id}/inverse-first-letter", response_model=List[InverseFirstLetterEntry])
 def get_inverse_first_letter_batch(
     wordset_id: str,
     size: int = Query(5, ge=1),
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    if wordset_id != 'inverse-first-letter-match':
-        raise HTTPException(status_code=404, detail='Inverse First Letter Match not available for this set')
-
-    import random
-
-    img_dir = settings.static_dir.parent / 'images'
-    try:
-        files = [p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
-    except Exception:
-        raise HTTPException(status_code=500, detail='Could not read images folder')
-
-    items = [(p.name, p.stem) for p in files if p.stem]
-    total = len(items)
-    if total == 0:
-        raise HTTPException(status_code=404, detail='No images available for Inverse First Letter Match')
-
-    n = size if size <= total else total
-    selected_items = random.sample(items, n)
-
-    batch: List[InverseFirstLetterEntry] = []
-    for fname, stem in selected_items:
-        correct_first_letter = stem[0].upper()
-
-        # Find all images that start with the correct letter
-        correct_images = [f for f, s in items if s and s[0].upper() == correct_first_letter]
-        
-        # Select a random correct image for this question
-        correct_image_fname = random.choice(correct_images)
-
-        # Select 3 random distractors (images that don't start with the correct letter)
-        distractor_images = [f for f, s in items if s and s[0].upper() != correct_first_letter]
-        random.shuffle(distractor_images)
-        
-        choices = distractor_images[:3] + [correct_image_fname]
-        random.shuffle(choices)
-        
-        batch.append(
-            InverseFirstLetterEntry(
-                id=correct_first_letter,
-                letter=correct_first_letter,
-                image_choices=[f"/images/{f}" for f in choices],
-                correct_index=choices.index(correct_image_fname),
-            )
-        )
-    return batch
+    return _respond(_inverse_first_letter_questions(wordset_id, size, thumb, seed))
 
 
 @app.get("/api/wordsets/{wordset_id}/next-hard", response_model=List[NextEntry])
@@ -405,82 +444,179 @@ def get_next_hard(
     wordset_id: str,
     size: int = Query(5, ge=1),
     max_len: Optional[int] = None,
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    if wordset_id != 'dynamic-hard':
-        raise HTTPException(status_code=404, detail='Hard mode not available for this set')
+    return _respond(_hard_questions(wordset_id, size, max_len, thumb, seed))
+
+
+def _mode_batch(wordset_id: str, size: int, max_len: Optional[int], thumb: Optional[int], seed: Optional[str], db: Session):
+    """Questions for ``wordset_id`` from the generator of its game mode."""
+    if wordset_id == 'first-letter-match':
+        return _first_letter_questions(wordset_id, size, thumb, seed)
+    if wordset_id == 'inverse-first-letter-match':
+        return _inverse_first_letter_questions(wordset_id, size, thumb, seed)
+    if wordset_id == 'dynamic-hard':
+        return _hard_questions(wordset_id, size, max_len, thumb, seed)
+    if wordset_id.startswith('dynamic-images'):
+        return _image_questions(wordset_id, size, max_len, thumb, seed)
+    return _next_questions(wordset_id, size, max_len, None, None, thumb, seed, db)
+
+
+@app.get("/api/session", response_model=SessionBundle)
+def get_session(
+    response: Response,
+    modes: str = Query(..., description="Comma-separated word set ids"),
+    size: int = Query(5, ge=1),
+    max_len: Optional[int] = None,
+    thumb: Optional[int] = Query(None, ge=0),
+    seed: Optional[str] = None,
+    wordsets: bool = False,
+    preload: int = Query(20, ge=0, le=100),
+    db: Session = Depends(get_db),
+):
+    """Questions for several modes, and the images they need, in one response.
+
+    The first ``preload`` image URLs are also sent as ``Link: rel=preload``
+    headers so the browser starts fetching them before parsing the body.
+    With ``wordsets`` the landing page list is included as well.
+    """
+    ids = list(dict.fromkeys(m.strip() for m in modes.split(",") if m.strip()))
+    if not ids:
+        raise HTTPException(status_code=422, detail="No modes given")
+    if len(ids) > MAX_SESSION_MODES:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_SESSION_MODES} modes per session")
+    questions = {
+        # a different seed per mode, so seeded modes do not draw the same words
+        wordset_id: _mode_batch(wordset_id, size, max_len, thumb, seed and f"{seed}:{wordset_id}", db)
+        for wordset_id in ids
+    }
+    images = question_images(q for batch in questions.values() for q in batch)
+    headers = {"Link": preload_links(images[:preload])} if preload and images else {}
+    listing = wordsets_with_stats(db) if wordsets else None
+    if settings.fast_json:
+        body = b'{"questions":{' + b",".join(
+            dumps(wordset_id) + b":" + encode_batch(batch) for wordset_id, batch in questions.items()
+        ) + b'},"images":' + dumps(images) + b',"wordsets":' + dumps(
+            [w.model_dump() for w in listing] if listing is not None else None
+        ) + b"}"
+        return json_response(body, headers)
+    response.headers.update(headers)
+    return {"questions": questions, "images": images, "wordsets": listing}
+
+
+def _trial_response(tr: TrialResult) -> TrialResponse:
+    return TrialResponse(
+        id=tr.id,
+        wordset_id=tr.wordset_id,
+        correct=tr.correct,
+        answered_at=tr.answered_at,
+    )
 
-    import random
-    from collections import defaultdict
 
-    img_dir = settings.static_dir.parent / 'images'
+def _record(trials: List[TrialCreate], db: Session) -> List[TrialResponse]:
+    rows = new_trial_rows(trials)
+    # Build the responses first: committed rows are expired and would be reloaded
+    responses = [_trial_response(tr) for tr in rows]
     try:
-        files = [p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')]
-    except Exception:
-        raise HTTPException(status_code=500, detail='Could not read images folder')
-
-    max_len_filter = max_len if max_len is not None else None
-    words = [(p.name, p.stem) for p in files if (max_len_filter is None or len(p.stem) <= max_len_filter)]
+        ingest(db, rows)
+    except Exception as e:
+        logger.exception("Error adding trial results")
+        raise HTTPException(status_code=500, detail=f"Failed to record trial: {e}")
+    return responses
+
+
+def stats_for(db: Session, wordset_id: str) -> StatsResponse:
+    stats = db.get(WordSetStats, wordset_id)
+    if stats is None:
+        return StatsResponse(best=0, total=0)
+    return StatsResponse(
+        best=stats.best,
+        total=stats.total,
+        average=stats.correct_sum / stats.total if stats.total else 0.0,
+        recent_average=stats.recent_avg,
+        last_played=stats.last_played,
+    )
 
-    words_by_letter = defaultdict(list)
-    for fname, stem in words:
-        words_by_letter[stem[0].upper()].append((fname, stem))
 
-    eligible_letters = [letter for letter, word_list in words_by_letter.items() if len(word_list) >= 3]
+if settings.async_db:
+    @app.post("/api/trials", response_model=TrialResponse)
+    async def create_trial(trial: TrialCreate, db: AsyncSession = Depends(get_async_db)):
+        return (await db.run_sync(lambda session: _record([trial], session)))[0]
 
-    if len(eligible_letters) < 1:
-        raise HTTPException(status_code=404, detail='Not enough images to generate a hard question')
+    @app.post("/api/trials/bulk", response_model=List[TrialResponse])
+    async def create_trials(trials: List[TrialCreate], db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: _record(trials, session))
 
-    batch: List[NextEntry] = []
-    for _ in range(size):
-        chosen_letter = random.choice(eligible_letters)
-        print(f"[DEBUG] get_next_hard - Chosen Letter: {chosen_letter}")
-        
-        correct_word_fname, correct_word_stem = random.choice(words_by_letter[chosen_letter])
+    @app.get("/api/stats/{wordset_id}", response_model=StatsResponse)
+    async def get_stats(wordset_id: str, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(stats_for, wordset_id)
+else:
+    @app.post("/api/trials", response_model=TrialResponse)
+    def create_trial(trial: TrialCreate, db: Session = Depends(get_db)):
+        return _record([trial], db)[0]
 
-        distractor_pool = [stem for fname, stem in words_by_letter[chosen_letter] if stem != correct_word_stem]
-        random.shuffle(distractor_pool)
-        distractors = distractor_pool[:2]
+    @app.post("/api/trials/bulk", response_model=List[TrialResponse])
+    def create_trials(trials: List[TrialCreate], db: Session = Depends(get_db)):
+        return _record(trials, db)
 
-        choices = distractors + [correct_word_stem]
-        random.shuffle(choices)
+    @app.get("/api/stats/{wordset_id}", response_model=StatsResponse)
+    def get_stats(wordset_id: str, db: Session = Depends(get_db)):
+        return stats_for(db, wordset_id)
 
-        batch.append(
-            NextEntry(
-                id=correct_word_stem,
-                image_path=f"/images/{correct_word_fname}",
-                choices=choices,
-                correct_index=choices.index(correct_word_stem),
-            )
-        )
-    
-    return batch
 
 
-@app.post("/api/trials", response_model=TrialResponse)
-def create_trial(trial: TrialCreate, db: Session = Depends(get_db)):
-    print(f"Received trial data: wordset_id={trial.wordset_id}, correct={trial.correct}")
+def _record_answers(answers: List[AnswerCreate], db: Session) -> dict:
+    if not settings.answer_log:
+        raise HTTPException(status_code=404, detail="The answer log is disabled")
     try:
-        tr = TrialResult(
-            id=str(uuid4()),
-            wordset_id=trial.wordset_id,
-            correct=trial.correct,
-            answered_at=datetime.utcnow(),
-        )
-        db.add(tr)
-        db.commit()
-        db.refresh(tr)
-        print(f"Successfully added trial result: {tr.id}")
-        return tr
+        record_answers(db, new_answer_rows(answers))
     except Exception as e:
-        db.rollback()
-        print(f"Error adding trial result: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to record trial: {e}")
-
-
-@app.get("/api/stats/{wordset_id}", response_model=StatsResponse)
-def get_stats(wordset_id: str, db: Session = Depends(get_db)):
-    results = db.query(TrialResult).filter(TrialResult.wordset_id == wordset_id).all()
-    total = len(results)
-    best = max((r.correct for r in results), default=0)
-    return StatsResponse(best=best, total=total)
+        logger.exception("Error adding answers")
+        raise HTTPException(status_code=500, detail=f"Failed to record answers: {e}")
+    return {"accepted": len(answers)}
+
+
+if settings.async_db:
+    @app.post("/api/answers", status_code=202)
+    async def create_answers(answers: List[AnswerCreate], db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: _record_answers(answers, session))
+
+    @app.get("/api/answers/{wordset_id}/summary", response_model=AnswerSummary)
+    async def get_answer_summary(
+        wordset_id: str,
+        since: Optional[int] = None,
+        limit: int = Query(20, ge=0),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        return await db.run_sync(lambda session: answer_summary(session, wordset_id, since, limit))
+else:
+    @app.post("/api/answers", status_code=202)
+    def create_answers(answers: List[AnswerCreate], db: Session = Depends(get_db)):
+        return _record_answers(answers, db)
+
+    @app.get("/api/answers/{wordset_id}/summary", response_model=AnswerSummary)
+    def get_answer_summary(
+        wordset_id: str,
+        since: Optional[int] = None,
+        limit: int = Query(20, ge=0),
+        db: Session = Depends(get_db),
+    ):
+        return answer_summary(db, wordset_id, since, limit)
+
+def _warm_up_calls():
+    """One default request per dynamic mode, then a full question pool refill."""
+    common = dict(size=1, thumb=None, seed=None, db=None)
+    calls = [
+        lambda: get_next("dynamic", max_len=None, lev=None, max_lev=None, **common),
+        lambda: get_next("dynamic-easy", max_len=None, lev=None, max_lev=None, **common),
+        lambda: get_next_images("dynamic-images", max_len=None, **common),
+        lambda: get_next_images("dynamic-images-easy", max_len=None, **common),
+        lambda: get_first_letter_batch("first-letter-match", **common),
+        lambda: get_inverse_first_letter_batch("inverse-first-letter-match", **common),
+        lambda: get_next_hard("dynamic-hard", max_len=None, **common),
+    ]
+    if question_pool.enabled:
+        calls.append(question_pool.refill)
+    return calls
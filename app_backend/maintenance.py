@@ -0,0 +1,240 @@
+"""Trial retention, rollup and compaction: python -m app_backend.maintenance
+
+1. Trials older than ``trial_retention_days`` are folded into per-wordset daily
+   rows in ``trial_rollups`` (count, sum, best, last played) and deleted,
+   optionally appended to a JSON-lines archive first.
+2. Daily rollups older than ``trial_rollup_weekly_after_days`` are merged into
+   weekly ones.
+3. Free pages are returned to the filesystem with ``PRAGMA incremental_vacuum``
+   and the planner statistics refreshed with a bounded ``ANALYZE``.
+
+Best score and total per wordset are unchanged: ``wordset_stats`` is maintained
+incrementally and never re-read from ``trial_results``, and
+:func:`stats.rebuild_stats` counts rollups as well as raw rows. Every batch is
+rolled up and deleted in one short transaction, so the job can run next to a
+live server (WAL mode, busy timeout); trials arriving meanwhile are newer than
+the cutoff and are not touched.
+"""
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import typer
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .models import TrialResult, TrialRollup
+from .settings import settings
+
+# (wordset_id, period, start) -> [trials, correct_sum, best, last_played]
+Rollups = Dict[Tuple[str, str, datetime], list]
+
+
+def period_start(when: datetime, period: str) -> datetime:
+    day = datetime(when.year, when.month, when.day)
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+
+def _add(rollups: Rollups, key, trials: int, correct_sum: int, best: int, last_played: datetime) -> None:
+    current = rollups.get(key)
+    if current is None:
+        rollups[key] = [trials, correct_sum, best, last_played]
+    else:
+        current[0] += trials
+        current[1] += correct_sum
+        current[2] = max(current[2], best)
+        current[3] = max(current[3], last_played)
+
+
+def _upsert(db: Session, rollups: Rollups) -> None:
+    """Add ``rollups`` to ``trial_rollups``; does not commit."""
+    if not rollups:
+        return
+    stmt = insert(TrialRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TrialRollup.wordset_id, TrialRollup.period, TrialRollup.start],
+        set_={
+            "trials": TrialRollup.trials + stmt.excluded.trials,
+            "correct_sum": TrialRollup.correct_sum + stmt.excluded.correct_sum,
+            "best": func.max(TrialRollup.best, stmt.excluded.best),
+            "last_played": func.max(TrialRollup.last_played, stmt.excluded.last_played),
+        },
+    )
+    db.execute(
+        stmt,
+        [
+            {
+                "wordset_id": wordset_id,
+                "period": period,
+                "start": start,
+                "trials": trials,
+                "correct_sum": correct_sum,
+                "best": best,
+                "last_played": last_played,
+            }
+            for (wordset_id, period, start), (trials, correct_sum, best, last_played) in rollups.items()
+        ],
+    )
+
+
+def roll_up_trials(db: Session, cutoff: datetime, batch_size: int = 5000, archive: Optional[Path] = None) -> int:
+    """Move trials answered before ``cutoff`` into daily rollups; return how many."""
+    wordset_ids = db.execute(select(TrialResult.wordset_id).distinct()).scalars().all()
+    moved = 0
+    for wordset_id in wordset_ids:
+        while True:
+            # per wordset and oldest first, straight off the (wordset_id, answered_at)
+            # index, so a batch touches few days and no row is read twice
+            rows = db.execute(
+                select(TrialResult.id, TrialResult.correct, TrialResult.answered_at)
+                .where(TrialResult.wordset_id == wordset_id, TrialResult.answered_at < cutoff)
+                .order_by(TrialResult.answered_at)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            rollups: Rollups = {}
+            for _, correct, answered_at in rows:
+                _add(rollups, (wordset_id, "day", period_start(answered_at, "day")), 1, correct, correct, answered_at)
+            try:
+                _upsert(db, rollups)
+                db.execute(delete(TrialResult).where(TrialResult.id.in_([r.id for r in rows])))
+                if archive is not None:
+                    # written before the commit: a failed commit leaves duplicates, never gaps
+                    with open(archive, "a") as f:
+                        for r in rows:
+                            record = {
+                                "id": r.id,
+                                "wordset_id": wordset_id,
+                                "correct": r.correct,
+                                "answered_at": r.answered_at.isoformat(),
+                            }
+                            f.write(json.dumps(record) + "\n")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            moved += len(rows)
+    return moved
+
+
+def merge_weeks(db: Session, cutoff: datetime) -> int:
+    """Merge daily rollups that start before ``cutoff`` into weekly ones; return how many."""
+    days = db.execute(
+        select(TrialRollup).where(TrialRollup.period == "day", TrialRollup.start < cutoff)
+    ).scalars().all()
+    if not days:
+        return 0
+    rollups: Rollups = {}
+    for r in days:
+        _add(rollups, (r.wordset_id, "week", period_start(r.start, "week")), r.trials, r.correct_sum, r.best, r.last_played)
+    try:
+        _upsert(db, rollups)
+        db.execute(delete(TrialRollup).where(TrialRollup.period == "day", TrialRollup.start < cutoff))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(days)
+
+
+def _pragma(conn, name: str) -> int:
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def database_size(engine: Engine) -> Tuple[int, int]:
+    """``(file bytes, free-list bytes)`` of the database."""
+    with engine.connect() as conn:
+        page_size = _pragma(conn, "page_size")
+        return _pragma(conn, "page_count") * page_size, _pragma(conn, "freelist_count") * page_size
+
+
+def compact(engine: Engine, step_pages: int = 1000, full: bool = False) -> None:
+    """Return free pages to the filesystem and refresh planner statistics.
+
+    With ``auto_vacuum=INCREMENTAL`` this frees ``step_pages`` pages per
+    transaction so writers are only briefly blocked. Older databases need a
+    one-time ``full`` VACUUM to switch to it; that rewrites the file under an
+    exclusive lock, so only do it while the server is stopped.
+    """
+    with engine.connect() as conn:
+        if full:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        elif _pragma(conn, "auto_vacuum") == 2:
+            while _pragma(conn, "freelist_count"):
+                # each step of the statement frees one page and execute() only steps
+                # once; executescript() runs it to completion in its own transaction
+                conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({step_pages});")
+        # sample at most ~1000 rows per index instead of reading every table
+        conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+        conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        conn.commit()
+
+
+def run(
+    engine: Engine,
+    db: Session,
+    retention_days: int,
+    weekly_after_days: int,
+    batch_size: int = 5000,
+    archive: Optional[Path] = None,
+    full_vacuum: bool = False,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Roll up, merge and compact; return what was done."""
+    now = now or datetime.utcnow()
+    size_before, _ = database_size(engine)
+    trials = roll_up_trials(db, now - timedelta(days=retention_days), batch_size, archive)
+    days = merge_weeks(db, period_start(now - timedelta(days=weekly_after_days), "week"))
+    free_before = database_size(engine)[1]
+    compact(engine, full=full_vacuum)
+    size_after, free_after = database_size(engine)
+    return {
+        "trials_rolled_up": trials,
+        "daily_rollups_merged": days,
+        "bytes_before": size_before,
+        "bytes_after": size_after,
+        "bytes_reclaimed": size_before - size_after,
+        "free_bytes_left": free_after,
+        "free_bytes_before_vacuum": free_before,
+    }
+
+
+def main(
+    retention_days: int = typer.Option(settings.trial_retention_days, help="Keep raw trials for this many days"),
+    weekly_after_days: int = typer.Option(
+        settings.trial_rollup_weekly_after_days, help="Merge daily rollups older than this into weeks"
+    ),
+    batch_size: int = typer.Option(5000, help="Trials per transaction"),
+    archive: Optional[Path] = typer.Option(None, help="Append the deleted trials to this JSON-lines file"),
+    full_vacuum: bool = typer.Option(
+        False, help="One-time VACUUM to enable incremental vacuuming (stop the server first)"
+    ),
+):
+    """Roll old trials up, delete them and compact the database."""
+    from .db import SessionLocal, engine
+    from .migrate import migrate
+
+    migrate(engine)
+    with SessionLocal() as db:
+        report = run(engine, db, retention_days, weekly_after_days, batch_size, archive, full_vacuum)
+    print(f"Rolled up and deleted {report['trials_rolled_up']} trials")
+    print(f"Merged {report['daily_rollups_merged']} daily rollups into weeks")
+    print(
+        f"Database {report['bytes_before']:,} -> {report['bytes_after']:,} bytes "
+        f"({report['bytes_reclaimed']:,} reclaimed)"
+    )
+    if report["free_bytes_left"]:
+        print(
+            f"{report['free_bytes_left']:,} bytes are free inside the file but not returned; "
+            "run once with --full-vacuum while the server is stopped"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,236 @@
+"""Request, database and question-generation metrics in Prometheus text format.
+
+:class:`MetricsMiddleware` times every HTTP request per route template and,
+through SQLAlchemy cursor events (:func:`instrument_engine`), counts the
+queries each request ran and the time spent in them. The per-request totals
+travel in a context variable, which FastAPI copies into the threadpool that
+runs sync endpoints. Everything is exposed on ``GET /metrics`` (see
+``main.py``); :func:`render` produces the text.
+"""
+import contextvars
+import functools
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+INF = 'le="+Inf"'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def timer(self, **labels):
+        """Decorator that observes the wall time of each call."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorate
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            total = cumulative + series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, INF)} {total}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {total}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries run per HTTP request.", ("route",), COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request.", ("route",)
+)
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Duration of single database queries.")
+GENERATION_SECONDS = Histogram(
+    "question_generation_seconds", "Time to generate one batch of questions.", ("mode",)
+)
+POOL_QUESTIONS = Counter(
+    "question_pool_questions_total", "Questions served, from the pool or generated inline.", ("source",)
+)
+WRITE_BEHIND_ROWS = Counter(
+    "write_behind_rows_total",
+    "Rows the write-behind writers dropped as unwritable or handed back because their buffer was full.",
+    ("writer", "outcome"),
+)
+
+REGISTRY = [
+    REQUEST_SECONDS,
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_SECONDS,
+    DB_QUERY_SECONDS,
+    GENERATION_SECONDS,
+    POOL_QUESTIONS,
+    WRITE_BEHIND_ROWS,
+]
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERY_SECONDS.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every query run through ``engine`` (pass ``AsyncEngine.sync_engine`` for async)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    # static mounts record their prefix in root_path
+    root_path = scope.get("root_path", "")
+    if root_path and root_path != scope.get("app_root_path", ""):
+        return root_path + "/*"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database work per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=status)
+            REQUEST_DB_QUERIES.observe(stats.queries, route=route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route=route)
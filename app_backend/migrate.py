@@ -0,0 +1,91 @@
+"""Bring an existing database up to the current schema.
+
+``create_all`` only creates missing tables; columns and indexes added to models
+later are not created on tables that already exist. This adds them (nullable
+columns via ``ALTER TABLE ... ADD COLUMN``) so older ``wordmatch.db`` files
+pick them up: python -m app_backend.migrate
+
+The API itself only runs :func:`check_schema` at startup, which inspects the
+database once and migrates only if something is missing.
+
+Summary tables created on a database that already holds trials are filled in
+the same step (``wordset_stats`` via :func:`stats.rebuild_stats`), so existing
+sets do not show empty stats until someone plays them again.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .models import Base, TrialResult, TrialRollup, WordSetStats
+from .stats import rebuild_stats
+
+
+class SchemaError(Exception):
+    """Raised when the database is behind the models and may not be migrated."""
+
+
+def pending_changes(engine: Engine) -> list:
+    """Names of the tables, columns and indexes missing from the database."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    pending = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            pending.append(table.name)
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        pending.extend(f"{table.name}.{c.name}" for c in table.columns if c.name not in columns)
+        indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        pending.extend(ix.name for ix in table.indexes if ix.name not in indexes)
+    return pending
+
+
+def check_schema(engine: Engine, auto_migrate: bool = True) -> list:
+    """Verify the schema; migrate if ``auto_migrate``, else raise :class:`SchemaError`.
+
+    Returns the names of what was created (empty if the schema was current).
+    """
+    pending = pending_changes(engine)
+    if not pending:
+        return []
+    if not auto_migrate:
+        raise SchemaError(
+            f"Database schema is out of date (missing {', '.join(pending)}); "
+            "run python -m app_backend.migrate"
+        )
+    return migrate(engine)
+
+
+def migrate(engine: Engine) -> list:
+    """Create missing tables, columns and indexes; return the names of those created."""
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    created = [t.name for t in Base.metadata.sorted_tables if existing_tables and t.name not in existing_tables]
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    col_type = column.type.compile(dialect=conn.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+                    created.append(f"{table.name}.{column.name}")
+            existing = {ix["name"] for ix in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=conn)
+                    created.append(index.name)
+    backfill = {TrialResult.__tablename__, TrialRollup.__tablename__} & existing_tables
+    if WordSetStats.__tablename__ in created and backfill:
+        with Session(engine) as db:
+            rebuild_stats(db)
+    return created
+
+
+if __name__ == "__main__":
+    from .db import engine
+
+    created = migrate(engine)
+    if created:
+        print(f"Created: {', '.join(created)}")
+    else:
+        print("Schema is up to date.")
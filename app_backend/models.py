@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, SmallInteger, Float, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -13,6 +13,8 @@ class WordSet(Base):
     title = Column(String, nullable=False)
     max_word_length = Column(Integer, nullable=True)
     min_levenshtein = Column(Integer, nullable=True)
+    # hash of the loaded file, so loading it again is a no-op
+    source_hash = Column(String, nullable=True, index=True)
 
     entries = relationship(
         "WordEntry", back_populates="wordset", cascade="all, delete-orphan"
@@ -23,7 +25,7 @@ class WordEntry(Base):
     __tablename__ = "word_entries"
 
     id = Column(String, primary_key=True, index=True)
-    wordset_id = Column(String, ForeignKey("word_sets.id"), nullable=False)
+    wordset_id = Column(String, ForeignKey("word_sets.id"), nullable=False, index=True)
     image_path = Column(String, nullable=False)
     correct_word = Column(String, nullable=False)
     distractors = Column(JSON, nullable=False)
@@ -33,8 +35,74 @@ class WordEntry(Base):
 
 class TrialResult(Base):
     __tablename__ = "trial_results"
+    __table_args__ = (
+        # best score per set (covering for MAX(correct) ... GROUP BY wordset_id)
+        Index("ix_trial_results_wordset_correct", "wordset_id", "correct"),
+        # per-set history in time order (stats backfill, retention)
+        Index("ix_trial_results_wordset_answered", "wordset_id", "answered_at"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     wordset_id = Column(String, ForeignKey("word_sets.id"), nullable=False)
     correct = Column(Integer, nullable=False)
-    answered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    answered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TrialRollup(Base):
+    """Trials past the retention window, aggregated per wordset and day or week (see maintenance.py)."""
+
+    __tablename__ = "trial_rollups"
+
+    wordset_id = Column(String, primary_key=True)
+    # "day" or "week"
+    period = Column(String, primary_key=True)
+    start = Column(DateTime, primary_key=True)
+    trials = Column(Integer, nullable=False)
+    correct_sum = Column(Integer, nullable=False)
+    best = Column(Integer, nullable=False)
+    last_played = Column(DateTime, nullable=False)
+
+
+class WordSetStats(Base):
+    """Running per-wordset summary of trial_results, updated on every insert."""
+
+    __tablename__ = "wordset_stats"
+
+    wordset_id = Column(String, primary_key=True)
+    best = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    correct_sum = Column(Integer, nullable=False, default=0)
+    # Exponential moving average of `correct` (see settings.stats_ema_alpha)
+    recent_avg = Column(Float, nullable=False, default=0.0)
+    last_played = Column(DateTime, nullable=True)
+
+
+class AnswerKey(Base):
+    """Integer codes for the strings answer_events refer to (word set and item ids)."""
+
+    __tablename__ = "answer_keys"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(String, nullable=False, unique=True)
+
+
+class AnswerEvent(Base):
+    """One answered question; append-only and kept narrow (integers only, see answers.py)."""
+
+    __tablename__ = "answer_events"
+    __table_args__ = (
+        # every aggregate is per word set, optionally over a time window
+        Index("ix_answer_events_wordset_time", "wordset", "answered_at"),
+        # covering indexes for the per-item counts and the answer-time histogram
+        Index("ix_answer_events_wordset_item", "wordset", "item", "correct"),
+        Index("ix_answer_events_wordset_latency", "wordset", "latency_ms"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    wordset = Column(Integer, nullable=False)  # answer_keys.id
+    mode = Column(SmallInteger, nullable=False)  # index into answers.MODES
+    item = Column(Integer, nullable=False)  # answer_keys.id
+    chosen = Column(SmallInteger, nullable=False)
+    correct = Column(SmallInteger, nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+    answered_at = Column(Integer, nullable=False)  # unix seconds
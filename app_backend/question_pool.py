@@ -0,0 +1,165 @@
+"""Pre-generated question buffers for the dynamic game modes.
+
+Generating a question shuffles word lists that grow with the image catalog, so
+instead of doing that on the request path each ``(mode, max_len, difficulty,
+...)`` key keeps a buffer of ready-made questions that a background thread tops
+up to ``settings.question_pool_size``. Endpoints pop what they need and only
+generate synchronously if the buffer runs dry (e.g. on the first request for a
+key). All buffers are dropped when the catalog snapshot changes.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .metrics import POOL_QUESTIONS
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+Generator = Callable[[int], list]
+
+
+class _Buffer:
+    __slots__ = ("items", "generate")
+
+    def __init__(self, generate: Generator):
+        self.items: deque = deque()
+        self.generate = generate
+
+
+class QuestionPool:
+    def __init__(self, capacity: int = 100, refill_interval: float = 0.5, max_keys: int = 64):
+        self.capacity = capacity
+        self.refill_interval = refill_interval
+        self.max_keys = max_keys
+        self._buffers: Dict[Hashable, _Buffer] = {}
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def start(self) -> None:
+        if self._thread is not None or not self.enabled:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="question-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+
+    def take(
+        self,
+        key: Hashable,
+        size: int,
+        generate: Generator,
+        version: Hashable = None,
+        unique: bool = True,
+    ) -> list:
+        """Pop ``size`` questions for ``key``, generating any shortfall inline.
+
+        ``generate(n)`` must return up to ``n`` fresh questions and is kept for
+        background refills. With ``unique`` the batch holds at most one
+        question per ``id``; if the key cannot supply ``size`` distinct
+        questions the batch is shorter, just like a direct ``generate(size)``.
+        """
+        if not self.enabled:
+            return generate(size)
+        with self._lock:
+            if version != self._version:
+                self._buffers.clear()
+                self._version = version
+            buf = self._buffers.get(key)
+            batch = self._pop(buf.items, size, unique) if buf is not None else []
+        POOL_QUESTIONS.inc(len(batch), source="pool")
+        pooled = len(batch)
+        if len(batch) < size:
+            fresh = generate(size)
+            seen = {q["id"] for q in batch}
+            for q in fresh:
+                if len(batch) == size:
+                    break
+                if unique and q["id"] in seen:
+                    continue
+                seen.add(q["id"])
+                batch.append(q)
+            POOL_QUESTIONS.inc(len(batch) - pooled, source="generated")
+        if buf is None:
+            # only keys that generated successfully are refilled in the background
+            with self._lock:
+                if version == self._version and key not in self._buffers:
+                    if len(self._buffers) >= self.max_keys:
+                        # forget the oldest key; dicts keep insertion order
+                        self._buffers.pop(next(iter(self._buffers)))
+                    self._buffers[key] = _Buffer(generate)
+        self._wake.set()
+        return batch
+
+    @staticmethod
+    def _pop(items: deque, size: int, unique: bool) -> List:
+        batch: List = []
+        if not unique:
+            while items and len(batch) < size:
+                batch.append(items.popleft())
+            return batch
+        seen = set()
+        skipped = []
+        while items and len(batch) < size:
+            q = items.popleft()
+            if q["id"] in seen:
+                skipped.append(q)
+                continue
+            seen.add(q["id"])
+            batch.append(q)
+        # duplicates go back to the front for the next request
+        items.extendleft(reversed(skipped))
+        return batch
+
+    def refill(self) -> int:
+        """Top up every buffer to ``capacity``; return the number of questions added."""
+        with self._lock:
+            version = self._version
+            pending = [(key, buf) for key, buf in self._buffers.items() if len(buf.items) < self.capacity]
+        added = 0
+        for key, buf in pending:
+            try:
+                fresh = buf.generate(self.capacity - len(buf.items))
+            except Exception:
+                logger.warning("question pool refill for %s failed", key, exc_info=True)
+                continue
+            with self._lock:
+                # the catalog changed while generating: these questions are stale
+                if self._version != version or self._buffers.get(key) is not buf:
+                    continue
+                buf.items.extend(fresh)
+            added += len(fresh)
+        return added
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.refill_interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            self.refill()
+
+
+question_pool = QuestionPool(
+    capacity=settings.question_pool_size,
+    refill_interval=settings.question_pool_refill_interval,
+)
@@ -0,0 +1,293 @@
+"""Question generators for the game modes.
+
+Each generator builds a batch from a catalog snapshot (or a cached legacy word
+set) and never touches the filesystem or the database, so it can run on the
+request path, in the question pool's background refill, or in benchmarks.
+``prefix`` is the URL prefix for image paths (see ``thumbnails.thumb_prefix``).
+
+Questions are plain dicts shaped like the models in ``schemas.py`` (named in
+each return annotation's comment): they are several times cheaper to build
+than the models, FastAPI validates them against ``response_model`` all the
+same, and the ``fast_json`` path can serialize them directly.
+"""
+import logging
+import random
+from typing import List, Optional
+
+from .catalog import CatalogSnapshot
+from .metrics import GENERATION_SECONDS
+from .sampling import ALPHABET_WITHOUT, GERMAN_ALPHABET, sample_except
+from .similarity import SimilarityIndex, pick_distractors
+
+
+logger = logging.getLogger(__name__)
+
+
+def _stem(item):
+    return item[1]
+
+
+class QuestionError(Exception):
+    """Raised when a batch cannot be generated from the available words."""
+
+
+@GENERATION_SECONDS.timer(mode="next")
+def next_batch(
+    snapshot: CatalogSnapshot,
+    size: int,
+    max_len: Optional[int] = None,
+    num_distractors: int = 3,
+    lev: Optional[int] = None,
+    max_lev: Optional[int] = None,
+    similarity: Optional[SimilarityIndex] = None,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # NextEntry
+    """Which word matches the picture?"""
+    # valid words (stem) filtered by max word length
+    words = snapshot.words(max_len)
+    stems = snapshot.stems_for(max_len)
+    allowed = snapshot.stem_set(max_len)
+    total = len(words)
+    if total == 0:
+        raise QuestionError('No images available')
+    n = size if size <= total else total
+    selected = rng.sample(words, n)
+    seen = set(selected)
+    # further random draws that may replace words without distractors
+    spare_draws = 4 * n
+    batch: List[dict] = []
+    for fname, stem in selected:
+        if similarity is not None and (lev is not None or max_lev is not None):
+            distractors = pick_distractors(
+                stem, stems, num_distractors,
+                similarity, lev, max_lev, allowed, rng=rng,
+            )
+        else:
+            # pick up to 3 distractors from remaining words
+            distractors = sample_except(stems, num_distractors, stem, rng=rng)
+        if not distractors:
+            # a question needs at least one wrong choice: draw another word instead
+            while spare_draws and len(seen) < total:
+                spare_draws -= 1
+                item = words[rng.randrange(total)]
+                if item not in seen:
+                    seen.add(item)
+                    selected.append(item)
+                    break
+            continue
+        choices = distractors + [stem]
+        rng.shuffle(choices)
+        batch.append(
+            dict(
+                id=stem,
+                image_path=f"{prefix}/images/{snapshot.asset_name(fname)}",
+                image_meta=snapshot.image_meta(fname),
+                choices=choices,
+                correct_index=choices.index(stem),
+            )
+        )
+    if not batch:
+        raise QuestionError("No distractors within the requested distance")
+    return batch
+
+
+@GENERATION_SECONDS.timer(mode="next-images")
+def image_batch(
+    snapshot: CatalogSnapshot,
+    size: int,
+    max_len: Optional[int] = None,
+    num_distractors: int = 3,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # NextImageEntry
+    """Which picture matches the word?"""
+    items = snapshot.words(max_len)
+    total = len(items)
+    if total == 0:
+        raise QuestionError('No images available for image-match')
+    n = size if size <= total else total
+    selected = rng.sample(items, n)
+    batch: List[dict] = []
+    for fname, stem in selected:
+        pool = sample_except(items, num_distractors, stem, key=_stem, rng=rng)
+        choices = [f for f, _ in pool] + [fname]
+        rng.shuffle(choices)
+        batch.append(
+            dict(
+                id=stem,
+                word=stem,
+                image_choices=[f"{prefix}/images/{snapshot.asset_name(f)}" for f in choices],
+                choice_meta=[snapshot.image_meta(f) for f in choices],
+                correct_index=choices.index(fname),
+            )
+        )
+    return batch
+
+
+@GENERATION_SECONDS.timer(mode="first-letter")
+def first_letter_batch(
+    snapshot: CatalogSnapshot,
+    size: int,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # FirstLetterEntry
+    """Which letter does the word start with?"""
+    items = snapshot.items
+    total = len(items)
+    if total == 0:
+        raise QuestionError('No images available for First Letter Match')
+
+    n = size if size <= total else total
+    selected = rng.sample(items, n)
+
+    batch: List[dict] = []
+    for fname, stem in selected:
+        correct_first_letter = stem[0].upper()
+
+        pool = ALPHABET_WITHOUT.get(correct_first_letter, GERMAN_ALPHABET)
+        distractors = rng.sample(pool, 3) # 3 distractors
+        choices = distractors + [correct_first_letter]
+        rng.shuffle(choices)
+
+        batch.append(
+            dict(
+                id=stem,
+                image_path=f"{prefix}/images/{snapshot.asset_name(fname)}",
+                image_meta=snapshot.image_meta(fname),
+                choices=choices,
+                correct_index=choices.index(correct_first_letter),
+            )
+        )
+    return batch
+
+
+@GENERATION_SECONDS.timer(mode="inverse-first-letter")
+def inverse_first_letter_batch(
+    snapshot: CatalogSnapshot,
+    size: int,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # InverseFirstLetterEntry
+    """Which picture starts with the letter?"""
+    items = snapshot.items
+    index = snapshot.letter_index()
+    total = len(items)
+    if total == 0:
+        raise QuestionError('No images available for Inverse First Letter Match')
+
+    n = size if size <= total else total
+    selected_items = rng.sample(items, n)
+
+    batch: List[dict] = []
+    for fname, stem in selected_items:
+        correct_first_letter = stem[0].upper()
+
+        # Select a random correct image for this question (any image that starts with the letter)
+        correct_image_fname, _ = index.choice(correct_first_letter, rng)
+
+        # Select 3 random distractors (images that don't start with the correct letter)
+        distractor_images = [f for f, _ in index.sample_without(correct_first_letter, 3, rng)]
+
+        choices = distractor_images + [correct_image_fname]
+        rng.shuffle(choices)
+
+        batch.append(
+            dict(
+                id=correct_first_letter,
+                letter=correct_first_letter,
+                image_choices=[f"{prefix}/images/{snapshot.asset_name(f)}" for f in choices],
+                choice_meta=[snapshot.image_meta(f) for f in choices],
+                correct_index=choices.index(correct_image_fname),
+            )
+        )
+    return batch
+
+
+@GENERATION_SECONDS.timer(mode="next-hard")
+def hard_batch(
+    snapshot: CatalogSnapshot,
+    size: int,
+    max_len: Optional[int] = None,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # NextEntry
+    """Which word matches the picture? (all choices share the first letter)"""
+    index = snapshot.letter_index(max_len)
+
+    eligible_letters = index.letters_with(3)
+
+    if len(eligible_letters) < 1:
+        raise QuestionError('Not enough images to generate a hard question')
+
+    batch: List[dict] = []
+    for _ in range(size):
+        chosen_letter = rng.choice(eligible_letters)
+        logger.debug("get_next_hard - Chosen Letter: %s", chosen_letter)
+
+        correct_word_fname, correct_word_stem = index.choice(chosen_letter, rng)
+
+        distractor_pool = sample_except(index.bucket(chosen_letter), 2, correct_word_stem, key=_stem, rng=rng)
+        distractors = [stem for _, stem in distractor_pool]
+
+        choices = distractors + [correct_word_stem]
+        rng.shuffle(choices)
+
+        batch.append(
+            dict(
+                id=correct_word_stem,
+                image_path=f"{prefix}/images/{snapshot.asset_name(correct_word_fname)}",
+                image_meta=snapshot.image_meta(correct_word_fname),
+                choices=choices,
+                correct_index=choices.index(correct_word_stem),
+            )
+        )
+    return batch
+
+
+@GENERATION_SECONDS.timer(mode="legacy")
+def legacy_batch(
+    ws,
+    size: int,
+    max_len: Optional[int] = None,
+    lev: Optional[int] = None,
+    max_lev: Optional[int] = None,
+    prefix: str = "",
+    rng=random,
+) -> List[dict]:  # NextEntry
+    """Word-match questions for a database word set (a ``wordset_cache.CachedWordSet``)."""
+    entries = ws.entries
+    if not entries:
+        raise QuestionError("No entries for WordSet")
+
+    total = len(entries)
+    if size > total:
+        size = total
+    selected = rng.sample(range(total), size)
+    max_word_length = max_len if max_len is not None else ws.max_word_length
+    min_lev = lev if lev is not None else ws.min_levenshtein
+    filtered = ws.distractors(max_word_length, min_lev, max_lev)
+    batch: List[dict] = []
+    for i in selected:
+        entry = entries[i]
+        filt = list(filtered[i])
+        desired = len(entry.distractors)
+        if len(filt) < desired:
+            filt.extend(ws.refill(entry.correct_word, filt, desired - len(filt), min_lev, max_lev, rng=rng))
+        if not filt:
+            # a question needs at least one wrong choice
+            continue
+        choices = filt + [entry.correct_word]
+        rng.shuffle(choices)
+        batch.append(
+            dict(
+                id=entry.id,
+                image_path=f"{prefix}/static/{entry.image_path}",
+                image_meta=None,
+                choices=choices,
+                correct_index=choices.index(entry.correct_word),
+            )
+        )
+    if not batch:
+        raise QuestionError("No distractors within the requested distance")
+    return batch
@@ -0,0 +1,114 @@
+"""Sampling helpers whose cost depends on ``k``, not on the size of the catalog.
+
+The question generators only need one to three distractors per question, so
+instead of filtering and shuffling the whole word list they draw random
+indices: :func:`sample_except` rejects the few draws that hit the correct word
+or a repeat, and :class:`LetterIndex` keeps the items sorted by first letter so
+"any item *not* starting with X" is a contiguous range with a hole that random
+indices can simply skip over.
+"""
+import random
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# (filename, stem), as in catalog.CatalogItem
+Item = Tuple[str, str]
+
+GERMAN_ALPHABET = list("ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÜ")
+
+# The alphabet without each letter, for first-letter distractors
+ALPHABET_WITHOUT = {letter: [l for l in GERMAN_ALPHABET if l != letter] for letter in GERMAN_ALPHABET}
+
+
+def _identity(x):
+    return x
+
+
+def sample_except(
+    population: Sequence[T],
+    k: int,
+    exclude: Hashable,
+    key: Callable[[T], Hashable] = _identity,
+    rng=random,
+) -> List[T]:
+    """Up to ``k`` random items of ``population`` with distinct keys other than ``exclude``.
+
+    Draws random indices and rejects excluded or repeated keys, which takes
+    O(k) draws unless most of the population is excluded; small or unlucky
+    populations fall back to an exact pass over the whole sequence.
+    """
+    n = len(population)
+    picked: List[T] = []
+    seen = {exclude}
+    if k <= 0:
+        return picked
+    if n > 4 * (k + 1):
+        for _ in range(4 * (k + 1)):
+            item = population[rng.randrange(n)]
+            value = key(item)
+            if value in seen:
+                continue
+            seen.add(value)
+            picked.append(item)
+            if len(picked) == k:
+                return picked
+    rest = [item for item in population if key(item) not in seen]
+    rng.shuffle(rest)
+    for item in rest:
+        value = key(item)
+        if value in seen:
+            continue
+        seen.add(value)
+        picked.append(item)
+        if len(picked) == k:
+            break
+    return picked
+
+
+class LetterIndex:
+    """Catalog items sorted by the upper-cased first letter of their stem.
+
+    ``ranges[letter]`` is the ``[lo, hi)`` slice of :attr:`items` for that
+    letter, so picking an item with a given letter and sampling items without
+    it are both index arithmetic.
+    """
+
+    def __init__(self, items: Sequence[Item]):
+        self.items: List[Item] = sorted(items, key=lambda item: (item[1][0].upper(), item))
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+        for i, (_, stem) in enumerate(self.items):
+            letter = stem[0].upper()
+            lo, _ = self.ranges.get(letter, (i, i))
+            self.ranges[letter] = (lo, i + 1)
+        self.buckets: Dict[str, List[Item]] = {
+            letter: self.items[lo:hi] for letter, (lo, hi) in self.ranges.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def bucket(self, letter: str) -> List[Item]:
+        return self.buckets.get(letter, [])
+
+    def letters_with(self, minimum: int) -> List[str]:
+        """Letters that start at least ``minimum`` items."""
+        return [letter for letter, (lo, hi) in self.ranges.items() if hi - lo >= minimum]
+
+    def choice(self, letter: str, rng=random) -> Optional[Item]:
+        """A random item whose stem starts with ``letter``."""
+        lo, hi = self.ranges.get(letter, (0, 0))
+        if hi == lo:
+            return None
+        return self.items[rng.randrange(lo, hi)]
+
+    def sample_without(self, letter: str, k: int, rng=random) -> List[Item]:
+        """Up to ``k`` distinct random items whose stem does not start with ``letter``.
+
+        Indices are drawn from the complement's length and shifted past the
+        letter's range, so no list of the other items is ever built.
+        """
+        lo, hi = self.ranges.get(letter, (0, 0))
+        m = len(self.items) - (hi - lo)
+        picks = rng.sample(range(m), min(k, m))
+        return [self.items[i + (hi - lo) if i >= lo else i] for i in picks]
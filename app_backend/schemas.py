@@ -0,0 +1,122 @@
+"""Request and response models for the API."""
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class WordSetMetadata(BaseModel):
+    id: str
+    title: str
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WordSetWithStats(WordSetMetadata):
+    best: int
+
+
+class ImageMeta(BaseModel):
+    # pixel size of the original, for the aspect ratio
+    width: int
+    height: int
+    # tiny blurred preview as a data: URL
+    placeholder: Optional[str] = None
+
+
+class NextEntry(BaseModel):
+    id: str
+    image_path: str
+    image_meta: Optional[ImageMeta] = None
+    choices: List[str]
+    correct_index: int
+
+
+class NextImageEntry(BaseModel):
+    id: str
+    word: str
+    image_choices: List[str]
+    # per entry of ``image_choices``
+    choice_meta: Optional[List[Optional[ImageMeta]]] = None
+    correct_index: int
+
+
+class FirstLetterEntry(BaseModel):
+    id: str
+    image_path: str
+    image_meta: Optional[ImageMeta] = None
+    choices: List[str]
+    correct_index: int
+
+
+class InverseFirstLetterEntry(BaseModel):
+    id: str
+    letter: str
+    image_choices: List[str]
+    # per entry of ``image_choices``
+    choice_meta: Optional[List[Optional[ImageMeta]]] = None
+    correct_index: int
+
+
+Question = Union[NextEntry, NextImageEntry, FirstLetterEntry, InverseFirstLetterEntry]
+
+
+class SessionBundle(BaseModel):
+    # word set id -> its batch
+    questions: Dict[str, List[Question]]
+    # every image URL in ``questions``, deduplicated
+    images: List[str]
+    wordsets: Optional[List[WordSetWithStats]] = None
+
+
+class TrialCreate(BaseModel):
+    wordset_id: str
+    correct: int
+
+
+class TrialResponse(BaseModel):
+    id: str
+    wordset_id: str
+    correct: int
+    answered_at: datetime
+
+
+class StatsResponse(BaseModel):
+    best: int
+    total: int
+    average: float = 0.0
+    recent_average: float = 0.0
+    last_played: Optional[datetime] = None
+
+
+class AnswerCreate(BaseModel):
+    wordset_id: str = Field(max_length=64)
+    # one of answers.MODES
+    mode: Literal["next", "next-images", "first-letter", "inverse-first-letter", "next-hard"]
+    # the question's id
+    item_id: str = Field(max_length=128)
+    chosen_index: int = Field(ge=0)
+    correct: bool
+    latency_ms: int = Field(ge=0)
+
+
+class WordErrors(BaseModel):
+    item: str
+    answers: int
+    errors: int
+    error_rate: float
+
+
+class LetterAccuracy(BaseModel):
+    letter: str
+    answers: int
+    accuracy: float
+
+
+class AnswerSummary(BaseModel):
+    total: int
+    accuracy: float
+    # p50 / p90 / p99 time to answer
+    latency_ms: Dict[str, float]
+    # hardest words first
+    words: List[WordErrors]
+    letters: List[LetterAccuracy]
@@ -3,11 +3,74 @@ try:
 except ImportError:
     from pydantic import BaseSettings
 from pathlib import Path
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/wordmatch.db"
+    # Create missing tables/columns at startup; if False, refuse to start instead
+    auto_migrate: bool = True
     static_dir: Path = Path(__file__).parent.parent / "static"
+    images_dir: Path = Path(__file__).parent.parent / "images"
+    # Seconds between mtime checks of images_dir
+    catalog_refresh_interval: float = 2.0
+    # Catalog scan shared by all worker processes (see catalog.py); None scans per process
+    catalog_snapshot_file: Optional[Path] = None
+    # Written by `python -m app_backend.assets`; loaded instead of scanning images_dir while current
+    asset_manifest_file: Optional[Path] = Path(__file__).parent.parent / "static" / "asset-manifest.json"
+    # Longest side of the blurred preview stored per image in the manifest; 0 stores none
+    placeholder_size: int = 16
+    # SQLite connection tuning (applied as PRAGMAs on every connect, see db.py)
+    sqlite_journal_mode: str = "WAL"
+    # INCREMENTAL lets maintenance.py return free pages without a full VACUUM (new databases only)
+    sqlite_auto_vacuum: str = "INCREMENTAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # negative values are KiB, positive values are pages
+    sqlite_cache_size: int = -32000
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    # Serve the DB-bound endpoints as async handlers on an aiosqlite engine
+    async_db: bool = False
+    # Put content-hashed image names in question payloads (see assets.py)
+    hashed_urls: bool = True
+    # Image derivatives (see thumbnails.py); thumbnail_width=0 serves originals
+    thumbnail_width: int = 320
+    thumbnail_sizes: List[int] = [160, 320, 640]
+    thumbnail_format: str = "webp"
+    thumbnail_quality: int = 75
+    thumbnail_dir: Path = Path(__file__).parent.parent / "data" / "thumbs"
+    thumbnail_cache_bytes: int = 256 * 1024 * 1024
+    # Buffer trials in memory and write them in batches (see trials.py)
+    trial_write_behind: bool = False
+    trial_flush_size: int = 100
+    trial_flush_interval: float = 1.0
+    # rows buffered at most; beyond that requests write synchronously
+    trial_buffer_limit: int = 10_000
+    # Per-answer event log (see answers.py); events are always appended in batches
+    answer_log: bool = True
+    answer_flush_size: int = 500
+    answer_flush_interval: float = 1.0
+    answer_buffer_limit: int = 50_000
+    # answer_keys ids kept in memory, least recently used dropped first
+    answer_key_cache_size: int = 100_000
+    # Ready-made questions kept per mode/parameters (see question_pool.py); 0 disables
+    question_pool_size: int = 100
+    question_pool_refill_interval: float = 0.5
+    # Encode question batches with orjson and skip response_model validation (see encoding.py)
+    fast_json: bool = False
+    # Trials older than this are rolled up into trial_rollups by maintenance.py
+    trial_retention_days: int = 90
+    # Daily rollups older than this are merged into weekly ones
+    trial_rollup_weekly_after_days: int = 365
+    # Weight of the newest trial in wordset_stats.recent_avg
+    stats_ema_alpha: float = 0.2
+    # Logging level for the app_backend loggers (DEBUG shows per-question detail)
+    log_level: str = "INFO"
+    # Record request/DB/generation timings and serve them on /metrics (see metrics.py)
+    metrics: bool = True
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
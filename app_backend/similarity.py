@@ -0,0 +1,299 @@
+"""Edit-distance index over the catalog words, used to pick distractors.
+
+Words are bucketed by length: the edit distance between two words is at least
+the difference of their lengths, so "all words within distance r of w" only
+involves the buckets of length ``len(w) - r .. len(w) + r``.
+
+For ``r <= DELETION_DEPTH`` a bucket is not scanned. It keeps the hashes of
+every string obtained by deleting up to ``DELETION_DEPTH`` characters from its
+words (the "deletion neighbourhood"), sorted. Two words within ``r`` edits
+share such a string reached by at most ``r`` deletions from each, so a query
+looks up its own deletions with ``searchsorted`` and only computes distances
+to the few words found. All words of a bucket have the same length, so each
+set of deleted positions is a column selection on the encoded words, hashed
+for the whole bucket at once. Wider ranges compare the whole buckets with one
+vectorised :func:`utils.levenshtein_many` call each.
+
+:meth:`SimilarityIndex.sync` only touches the buckets whose words changed:
+added words are merged into the sorted arrays, a bucket that lost words is
+rebuilt on first use. Query results are kept in a small LRU, and a sync drops
+only the entries the changed buckets could affect.
+"""
+import random
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .utils import encode_words, levenshtein_many
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# query results kept per index
+CACHE_SIZE = 1024
+# distances up to this are answered from the deletion index
+DELETION_DEPTH = 2
+# multiplier of the polynomial hash over code points (arithmetic wraps at 64 bits)
+_PRIME = 0x100000001B3
+
+
+@lru_cache(maxsize=None)
+def _kept_columns(length: int, count: int):
+    """Column indices left after deleting ``count`` of ``length`` positions, one row per choice."""
+    rows = [[c for c in range(length) if c not in drop] for drop in combinations(range(length), count)]
+    return np.array(rows, dtype=np.intp).reshape(len(rows), max(length - count, 0))
+
+
+def _hash_rows(codes):
+    """64-bit polynomial hash of each row of a code point matrix."""
+    h = np.zeros(len(codes), dtype=np.uint64)
+    for c in range(codes.shape[1]):
+        h = h * np.uint64(_PRIME) + codes[:, c]
+    return h
+
+
+def _deletion_hashes(word: str, depth: int) -> List:
+    """Hashes of the strings reached from ``word`` by 0, 1, ..., ``depth`` deletions."""
+    codes = np.frombuffer(word.encode("utf-32-le"), dtype=np.uint32)
+    return [_hash_rows(codes[_kept_columns(len(word), i)]) for i in range(depth + 1)]
+
+
+def _deletion_table(codes, depth: int, start: int = 0) -> List[Tuple]:
+    """Per deletion count: ``(hashes, word ids)`` sorted by hash, for equal-length encoded words.
+
+    Word ids count from ``start``.
+    """
+    n, length = codes.shape
+    table = []
+    for j in range(depth + 1):
+        cols = _kept_columns(length, j)
+        if n and len(cols):
+            keys = np.concatenate([_hash_rows(codes[:, kept]) for kept in cols])
+        else:
+            keys = np.zeros(0, dtype=np.uint64)
+        ids = np.tile(np.arange(start, start + n), len(cols))
+        order = np.argsort(keys, kind="stable")
+        table.append((keys[order], ids[order]))
+    return table
+
+
+class _Bucket:
+    """The words of one length and their lookup structures, built on first use.
+
+    Never changed once shared: :meth:`changed` returns a new bucket.
+    """
+
+    __slots__ = ("words", "depth", "_encoded", "_table")
+
+    def __init__(self, words: List[str], depth: int, table: Optional[List[Tuple]] = None):
+        self.words = words
+        self.depth = depth
+        self._encoded = None
+        self._table = table
+
+    def encoded(self):
+        if self._encoded is None:
+            self._encoded = encode_words(self.words)
+        return self._encoded
+
+    def table(self) -> List[Tuple]:
+        if self._table is None:
+            self._table = _deletion_table(self.encoded()[0], self.depth)
+        return self._table
+
+    def changed(self, added: Set[str], removed: Set[str]) -> "_Bucket":
+        if removed:
+            return _Bucket(sorted((set(self.words) - removed) | added), self.depth)
+        added = sorted(added)
+        table = self._table
+        if table is not None:
+            merged = []
+            for (keys, ids), (new_keys, new_ids) in zip(table, _deletion_table(encode_words(added)[0], self.depth, len(self.words))):
+                at = np.searchsorted(keys, new_keys)
+                merged.append((np.insert(keys, at, new_keys), np.insert(ids, at, new_ids)))
+            table = merged
+        return _Bucket(self.words + added, self.depth, table)
+
+    def lookup(self, word: str, query: List, max_dist: int) -> List[str]:
+        """Words sharing a deletion with ``word`` within ``max_dist`` on both sides.
+
+        ``query`` holds the hashes of ``word``'s deletions per count, as arrays.
+        """
+        table = self.table()
+        found = []
+        for i, hashes in enumerate(query):
+            # both sides must arrive at the same length
+            j = len(self.words[0]) - len(word) + i
+            if not 0 <= j <= max_dist:
+                continue
+            keys, ids = table[j]
+            lo = np.searchsorted(keys, hashes, "left")
+            hi = np.searchsorted(keys, hashes, "right")
+            found.extend(ids[a:b] for a, b in zip(lo[lo < hi], hi[lo < hi]))
+        if not found:
+            return []
+        return [self.words[i] for i in np.unique(np.concatenate(found))]
+
+
+class SimilarityIndex:
+    """Length-bucketed neighbourhood index over a changing vocabulary."""
+
+    def __init__(self, words: Iterable[str] = (), cache_size: int = CACHE_SIZE, depth: int = DELETION_DEPTH):
+        self.cache_size = cache_size
+        self.depth = depth
+        self._words: Set[str] = set()
+        self._buckets: Dict[int, _Bucket] = {}
+        # in_range results, least recently used first
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.sync(words)
+
+    def sync(self, words: Iterable[str]) -> None:
+        """Make ``words`` the current vocabulary, updating only the buckets that changed."""
+        words = set(words)
+        with self._lock:
+            added = words - self._words
+            removed = self._words - words
+            if not added and not removed:
+                return
+            by_length: Dict[int, Tuple[Set[str], Set[str]]] = {}
+            for w in added:
+                by_length.setdefault(len(w), (set(), set()))[0].add(w)
+            for w in removed:
+                by_length.setdefault(len(w), (set(), set()))[1].add(w)
+            buckets = dict(self._buckets)
+            for length, (plus, minus) in by_length.items():
+                bucket = buckets.get(length)
+                if bucket is None:
+                    bucket = _Bucket(sorted(plus), self.depth)
+                else:
+                    bucket = bucket.changed(plus, minus)
+                if bucket.words:
+                    buckets[length] = bucket
+                else:
+                    buckets.pop(length, None)
+            self._words = words
+            self._buckets = buckets
+            for key in list(self._cache):
+                word, _, max_dist = key
+                if any(abs(len(word) - length) <= max_dist for length in by_length):
+                    del self._cache[key]
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def build(self) -> None:
+        """Build every bucket's lookup structures now instead of on the first query that needs them."""
+        if np is None:
+            return
+        for bucket in list(self._buckets.values()):
+            bucket.table()
+            bucket.encoded()
+
+    def _search(self, word: str, min_dist: int, max_dist: int) -> FrozenSet[str]:
+        buckets = self._buckets
+        lengths = range(max(len(word) - max_dist, 0), len(word) + max_dist + 1)
+        indexed = np is not None and max_dist <= self.depth
+        if indexed:
+            query = _deletion_hashes(word, max_dist)
+        found = []
+        for length in lengths:
+            bucket = buckets.get(length)
+            if bucket is None:
+                continue
+            if indexed:
+                candidates = bucket.lookup(word, query, max_dist)
+                if not candidates:
+                    continue
+                distances = levenshtein_many(word, candidates)
+            else:
+                candidates = bucket.words
+                distances = levenshtein_many(word, candidates, _encoded=bucket.encoded() if np is not None else None)
+            found.extend(w for w, d in zip(candidates, distances) if min_dist <= d <= max_dist)
+        return frozenset(found)
+
+    def in_range(self, word: str, min_dist: int = 0, max_dist: Optional[int] = None) -> FrozenSet[str]:
+        """Words whose distance to ``word`` lies in ``[min_dist, max_dist]``.
+
+        Without ``max_dist`` this is the whole vocabulary minus the close words,
+        so prefer :func:`pick_distractors`, which avoids materialising it.
+        """
+        if max_dist is None:
+            return frozenset(self._words - self.neighbours(word, min_dist - 1))
+        if max_dist < min_dist:
+            return frozenset()
+        key = (word, min_dist, max_dist)
+        with self._lock:
+            found = self._cache.get(key)
+            if found is not None:
+                self._cache.move_to_end(key)
+                return found
+        found = self._search(word, min_dist, max_dist)
+        with self._lock:
+            self._cache[key] = found
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def neighbours(self, word: str, radius: int) -> FrozenSet[str]:
+        """Words within ``radius`` edits of ``word``, including ``word`` itself."""
+        if radius < 0:
+            return frozenset()
+        return self.in_range(word, 0, radius) | {word}
+
+
+def pick_distractors(
+    word: str,
+    pool: Sequence[str],
+    k: int,
+    index: SimilarityIndex,
+    min_dist: Optional[int] = None,
+    max_dist: Optional[int] = None,
+    allowed: Optional[AbstractSet[str]] = None,
+    rng=random,
+) -> List[str]:
+    """Pick up to ``k`` distinct words from ``pool`` whose distance to ``word`` is in range.
+
+    ``allowed`` is ``pool`` as a set, or None if ``pool`` is the index's whole
+    vocabulary. With ``max_dist`` the result is shorter than ``k`` (possibly
+    empty) when fewer words of ``pool`` lie in range; it never goes beyond it.
+    """
+    min_dist = max(min_dist or 1, 1)
+    if max_dist is not None:
+        candidates = sorted(
+            w for w in index.in_range(word, min_dist, max_dist) if allowed is None or w in allowed
+        )
+        return rng.sample(candidates, min(k, len(candidates)))
+
+    # Only the (few) words closer than min_dist are excluded, so rejection
+    # sampling from the pool almost always succeeds in a handful of draws.
+    close = index.neighbours(word, min_dist - 1)
+    picked: List[str] = []
+    seen = set(close)
+    attempts = 8 * k if pool else 0
+    while attempts and len(picked) < k:
+        attempts -= 1
+        w = pool[rng.randrange(len(pool))]
+        if w not in seen:
+            seen.add(w)
+            picked.append(w)
+    if len(picked) < k:
+        rest = [w for w in pool if w not in seen]
+        picked.extend(rng.sample(rest, min(k - len(picked), len(rest))))
+    return picked
+
+
+def within_range(word: str, candidates: Iterable[str], min_dist: Optional[int] = None, max_dist: Optional[int] = None) -> List[str]:
+    """Filter ``candidates`` by their distance to ``word`` (for small, ad-hoc lists)."""
+    candidates = list(candidates)
+    if (min_dist is None and max_dist is None) or not candidates:
+        return candidates
+    result = []
+    for c, d in zip(candidates, levenshtein_many(word, candidates)):
+        if (min_dist is None or d >= min_dist) and (max_dist is None or d <= max_dist):
+            result.append(c)
+    return result
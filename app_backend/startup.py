@@ -0,0 +1,86 @@
+"""Warm-up work that would otherwise land on the first requests.
+
+``main.py`` checks the schema in its lifespan (:func:`ensure_schema`) and then
+runs :func:`warm_up` in a background thread; ``/api/ready`` answers 503 until it has finished, so a
+load balancer or autoscaler only routes traffic to a process whose catalog,
+caches and question pool are built. Requests arriving earlier still work, they
+just build what they need on demand.
+
+Under gunicorn with ``preload_app`` the master runs :func:`ensure_schema` and
+:func:`warm_caches` before forking (see gunicorn.conf.py). The workers inherit
+the results, so their own calls find the schema checked and the caches current
+and return without doing the work again.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from .catalog import CatalogError, catalog
+from .db import SessionLocal, engine
+from .migrate import check_schema
+from .models import WordSet
+from .settings import settings
+from .thumbnails import derivatives
+from .wordset_cache import wordset_cache
+
+logger = logging.getLogger(__name__)
+
+ready = threading.Event()
+# set in the gunicorn master before forking, so the workers skip the check
+_schema_checked = False
+
+
+def ensure_schema() -> None:
+    """Run :func:`migrate.check_schema` unless this process (or the one it was forked from) did."""
+    global _schema_checked
+    if _schema_checked:
+        return
+    created = check_schema(engine, settings.auto_migrate)
+    if created:
+        logger.info("Created: %s", ", ".join(created))
+    _schema_checked = True
+
+
+def warm_caches() -> None:
+    """Scan the catalog and fill the per-snapshot, similarity, thumbnail and word set caches."""
+    try:
+        snapshot = catalog.refresh()
+    except CatalogError as e:
+        logger.warning("%s", e)
+    else:
+        for fname in snapshot.filenames:
+            snapshot.asset_name(fname)
+        snapshot.letter_index()
+        catalog.similarity.build()
+    derivatives.load()
+    with SessionLocal() as db:
+        for (wordset_id,) in db.query(WordSet.id).all():
+            wordset_cache.get(db, wordset_id)
+
+
+def warm_up(calls: Iterable[Callable[[], object]] = ()) -> float:
+    """Run :func:`warm_caches` and then ``calls``; mark the process ready either way.
+
+    Failures are logged rather than raised: everything warmed here is also
+    built lazily, so a failed warm-up only costs the first requests time.
+    Returns the seconds taken.
+    """
+    start = time.perf_counter()
+    for step in (warm_caches, *calls):
+        try:
+            step()
+        except Exception:
+            logger.warning("Warm-up step %s failed", getattr(step, "__name__", step), exc_info=True)
+    ready.set()
+    elapsed = time.perf_counter() - start
+    logger.info("ready after %.2fs of warm-up", elapsed)
+    return elapsed
+
+
+def start_warm_up(calls: Iterable[Callable[[], object]] = ()) -> threading.Thread:
+    """Run :func:`warm_up` in a daemon thread."""
+    ready.clear()
+    thread = threading.Thread(target=warm_up, args=(list(calls),), name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,112 @@
+"""Incrementally maintained per-wordset statistics (the ``wordset_stats`` table).
+
+:func:`update_stats` folds a batch of new trial rows into the summary inside the
+caller's transaction, so reading stats is a primary-key lookup no matter how
+many trials have been recorded.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .models import TrialResult, TrialRollup, WordSetStats
+from .settings import settings
+
+
+def _ema(values: List[int], alpha: float) -> Tuple[float, float, float]:
+    """Return ``(decay, contribution, fresh)`` for folding ``values`` into an EMA.
+
+    An existing average ``e`` becomes ``e * decay + contribution``; with no
+    previous average the result is ``fresh`` (seeded with the first value).
+    """
+    decay = (1 - alpha) ** len(values)
+    contribution = 0.0
+    fresh = float(values[0])
+    for i, v in enumerate(values):
+        contribution = contribution * (1 - alpha) + alpha * v
+        if i:
+            fresh = fresh * (1 - alpha) + alpha * v
+    return decay, contribution, fresh
+
+
+def update_stats(db: Session, rows: Iterable[TrialResult]) -> None:
+    """Add ``rows`` to ``wordset_stats``; does not commit."""
+    grouped: Dict[str, List[TrialResult]] = defaultdict(list)
+    for r in rows:
+        grouped[r.wordset_id].append(r)
+    alpha = settings.stats_ema_alpha
+    for wordset_id, trials in grouped.items():
+        trials.sort(key=lambda r: r.answered_at)
+        values = [r.correct for r in trials]
+        decay, contribution, fresh = _ema(values, alpha)
+        stmt = insert(WordSetStats).values(
+            wordset_id=wordset_id,
+            best=max(values),
+            total=len(values),
+            correct_sum=sum(values),
+            recent_avg=fresh,
+            last_played=trials[-1].answered_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WordSetStats.wordset_id],
+            set_={
+                "best": func.max(WordSetStats.best, stmt.excluded.best),
+                "total": WordSetStats.total + stmt.excluded.total,
+                "correct_sum": WordSetStats.correct_sum + stmt.excluded.correct_sum,
+                "recent_avg": WordSetStats.recent_avg * decay + contribution,
+                "last_played": func.max(
+                    func.coalesce(WordSetStats.last_played, stmt.excluded.last_played),
+                    stmt.excluded.last_played,
+                ),
+            },
+        )
+        db.execute(stmt)
+
+
+def rebuild_stats(db: Session, chunk_size: int = 10000) -> int:
+    """Recompute ``wordset_stats`` from scratch out of ``trial_results``.
+
+    Rows are streamed in ``answered_at`` order so the moving average matches
+    what incremental updates would have produced. Trials already rolled up into
+    ``trial_rollups`` (see maintenance.py) count towards best, total and sum
+    exactly; their moving average is approximated by their mean. Returns the
+    number of trials counted. Commits.
+    """
+    db.query(WordSetStats).delete()
+    count = 0
+    rolled_up = db.query(
+        TrialRollup.wordset_id,
+        func.max(TrialRollup.best),
+        func.sum(TrialRollup.trials),
+        func.sum(TrialRollup.correct_sum),
+        func.max(TrialRollup.last_played),
+    ).group_by(TrialRollup.wordset_id)
+    for wordset_id, best, total, correct_sum, last_played in rolled_up:
+        db.execute(
+            insert(WordSetStats).values(
+                wordset_id=wordset_id,
+                best=best,
+                total=total,
+                correct_sum=correct_sum,
+                recent_avg=correct_sum / total,
+                last_played=last_played,
+            )
+        )
+        count += total
+    query = (
+        db.query(TrialResult.wordset_id, TrialResult.correct, TrialResult.answered_at)
+        .order_by(TrialResult.wordset_id, TrialResult.answered_at)
+        .yield_per(chunk_size)
+    )
+    batch = []
+    for row in query:
+        batch.append(row)
+        count += 1
+        if len(batch) >= chunk_size:
+            update_stats(db, batch)
+            batch = []
+    update_stats(db, batch)
+    db.commit()
+    return count
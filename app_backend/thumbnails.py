@@ -0,0 +1,193 @@
+"""Size-bucketed WebP/AVIF derivatives of the quiz images.
+
+Derivatives are produced on first request (or ahead of time with
+``python -m app_backend.thumbnails``) and stored in ``settings.thumbnail_dir``
+under a name derived from the source's content hash, the size bucket and the
+format, so an edited source never serves a stale thumbnail. The cache is kept
+under ``settings.thumbnail_cache_bytes`` by evicting the least recently used
+files (see :class:`DerivativeCache`; access time is also recorded in the file
+mtime, so it survives restarts and is shared by workers).
+
+Pillow is optional: without it :func:`thumb_prefix` returns ``""`` and all
+URLs keep pointing at the originals.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .settings import settings
+from .utils import content_hash, file_lock
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+# part of every derivative's name; bump when rendering changes so old files are not served
+RENDER_VERSION = 2
+
+
+def output_format() -> str:
+    fmt = settings.thumbnail_format.lower()
+    if fmt == "avif" and not (Image is not None and features.check("avif")):
+        return "webp"
+    return fmt
+
+
+def bucket_for(width: int) -> int:
+    """Smallest configured size bucket that is at least ``width`` wide."""
+    buckets = sorted(settings.thumbnail_sizes)
+    for b in buckets:
+        if b >= width:
+            return b
+    return buckets[-1]
+
+
+def thumb_prefix(width: Optional[int] = None) -> str:
+    """URL prefix (e.g. ``/thumbs/320``) to put in front of ``/images/...`` paths.
+
+    ``width`` defaults to ``settings.thumbnail_width``; 0 requests the originals.
+    """
+    if width is None:
+        width = settings.thumbnail_width
+    if not width or Image is None:
+        return ""
+    return f"/thumbs/{bucket_for(width)}"
+
+
+class DerivativeCache:
+    """Derivative files plus an in-memory LRU of their names and sizes.
+
+    The LRU is read from the directory (oldest mtime first) on first use or
+    :meth:`load`, and
+    again, under a lock shared by every process using the directory, whenever a
+    render takes it over ``max_bytes`` or it is older than ``resync_interval``
+    seconds. Eviction then removes the least recently used files down to
+    ``low_water`` of the budget in one pass, counting other workers' files too.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, low_water: float = 0.9, resync_interval: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.resync_interval = resync_interval
+        # file name -> size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for p in self.directory.iterdir():
+            # skips temporary files and the lock file
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, p.name, st.st_size))
+        files.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in files)
+        self._total = sum(self._entries.values())
+        self._synced_at = time.monotonic()
+
+    def load(self) -> None:
+        """Read the LRU from the directory now instead of on the first render."""
+        with self._lock:
+            if self._synced_at is None:
+                self._scan()
+
+    def get(self, source: Path, bucket: int) -> Path:
+        """Path of the derivative for ``source`` at ``bucket``, creating it if needed."""
+        fmt = output_format()
+        name = f"{content_hash(source)}-{bucket}-v{RENDER_VERSION}.{fmt}"
+        target = self.directory / name
+        if target.exists():
+            # mark as recently used, in memory and (for the other workers and restarts) on disk
+            os.utime(target)
+            with self._lock:
+                if name in self._entries:
+                    self._entries.move_to_end(name)
+            return target
+        with self._lock:
+            if self._synced_at is None:
+                self._scan()
+            if not target.exists():
+                self._render(source, target, bucket, fmt)
+                self._entries[name] = target.stat().st_size
+                self._total += self._entries[name]
+                if self._total > self.max_bytes or time.monotonic() - self._synced_at > self.resync_interval:
+                    self._evict(keep=name)
+        return target
+
+    def _evict(self, keep: str) -> None:
+        with file_lock(self.directory / ".lock"):
+            self._scan()
+            if self._total <= self.max_bytes:
+                return
+            goal = self.max_bytes * self.low_water
+            for name in list(self._entries):
+                if self._total <= goal:
+                    break
+                if name == keep:
+                    continue
+                self._total -= self._entries.pop(name)
+                (self.directory / name).unlink(missing_ok=True)
+
+    @staticmethod
+    def _render(source: Path, target: Path, bucket: int, fmt: str) -> None:
+        with Image.open(source) as im:
+            # the derivative has no EXIF orientation: rotate the pixels instead, as assets.placeholder does
+            im = ImageOps.exif_transpose(im)
+            if im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+            im.thumbnail((bucket, bucket))
+            # per process: workers sharing thumbnail_dir may render the same file at once
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            im.save(tmp, format=fmt.upper(), quality=settings.thumbnail_quality)
+        os.replace(tmp, target)
+
+
+derivatives = DerivativeCache(settings.thumbnail_dir, settings.thumbnail_cache_bytes)
+
+
+def derivative_for(source: Path, bucket: int) -> Tuple[Path, Optional[str]]:
+    """``(path, media_type)`` to serve for ``source`` at ``bucket``.
+
+    Falls back to the original file if Pillow is missing or rendering fails.
+    """
+    if Image is None:
+        return source, None
+    try:
+        return derivatives.get(source, bucket), MEDIA_TYPES.get(output_format())
+    except Exception:
+        logger.warning("thumbnail for %s failed, serving original", source, exc_info=True)
+        return source, None
+
+
+def pregenerate() -> int:
+    """Render every catalog image at every size bucket; return the number of files."""
+    from .catalog import catalog
+
+    count = 0
+    for fname in catalog.refresh().filenames:
+        for bucket in settings.thumbnail_sizes:
+            derivatives.get(settings.images_dir / fname, bucket)
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    if Image is None:
+        raise SystemExit("Pillow is not installed")
+    print(f"Generated {pregenerate()} thumbnails in {settings.thumbnail_dir}")
@@ -0,0 +1,206 @@
+"""Trial ingestion: batched inserts and an optional write-behind queue.
+
+Every trial goes through :func:`ingest`. With ``trial_write_behind`` disabled
+the rows are written in one transaction on the request's session; with it
+enabled they are buffered in memory and flushed by a background thread in one
+transaction once ``trial_flush_size`` rows are waiting or
+``trial_flush_interval`` seconds have passed, and on shutdown.
+
+A batch that fails is retried with the next flush; after ``max_retries``
+failures its rows are written one by one and those that still fail (bad data,
+constraint violations) are logged and dropped, so one such row cannot hold up
+everything queued after it. A locked or unavailable database is retried
+without limit instead, and while ``trial_buffer_limit`` rows are waiting new
+ones are written synchronously by the request.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Iterable, List
+from uuid import uuid4
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .metrics import WRITE_BEHIND_ROWS
+from .models import TrialResult
+from .settings import settings
+from .stats import update_stats
+
+logger = logging.getLogger(__name__)
+
+
+def new_trial_rows(trials: Iterable) -> List[TrialResult]:
+    """Build (unsaved) ``TrialResult`` rows from objects with ``wordset_id``/``correct``."""
+    now = datetime.utcnow()
+    return [
+        TrialResult(
+            id=str(uuid4()),
+            wordset_id=t.wordset_id,
+            correct=t.correct,
+            answered_at=now,
+        )
+        for t in trials
+    ]
+
+
+def write_trials(db: Session, rows: List[TrialResult]) -> None:
+    """Insert ``rows`` and update ``wordset_stats`` in a single transaction."""
+    if not rows:
+        return
+    try:
+        db.add_all(rows)
+        update_stats(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+class TrialWriter:
+    """In-memory buffer of trial rows, flushed in one transaction per batch.
+
+    Subclasses buffer other rows by overriding :meth:`write`.
+    """
+
+    thread_name = "trial-writer"
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10_000,
+        max_retries: int = 3,
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self._buffer: List = []
+        # rows of the last failed flush, written before the buffer by the next one
+        self._retry: List = []
+        self._attempts = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still buffered."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def write(self, db: Session, rows: List) -> None:
+        write_trials(db, rows)
+
+    def submit(self, rows: List) -> bool:
+        """Queue ``rows``; return False, queueing nothing, if the buffer is full."""
+        with self._cond:
+            if len(self._retry) + len(self._buffer) + len(rows) > self.max_buffer:
+                WRITE_BEHIND_ROWS.inc(len(rows), writer=self.thread_name, outcome="overflow")
+                return False
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.flush_size:
+                self._cond.notify()
+        return True
+
+    def _write(self, rows: List) -> None:
+        db = self.session_factory()
+        try:
+            self.write(db, rows)
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """Write all buffered rows now; return how many were written."""
+        with self._cond:
+            rows = self._retry + self._buffer
+            self._retry, self._buffer = [], []
+        if not rows:
+            return 0
+        try:
+            self._write(rows)
+        except OperationalError:
+            logger.exception("Error flushing %d rows (%s), will retry", len(rows), self.thread_name)
+            self._keep(rows)
+            return 0
+        except Exception:
+            self._attempts += 1
+            if self._attempts < self.max_retries:
+                logger.exception("Error flushing %d rows (%s), will retry", len(rows), self.thread_name)
+                self._keep(rows)
+                return 0
+            logger.exception(
+                "Error flushing %d rows (%s) %d times, writing them one by one", len(rows), self.thread_name, self._attempts
+            )
+            return self._write_each(rows)
+        self._attempts = 0
+        return len(rows)
+
+    def _keep(self, rows: List) -> None:
+        with self._cond:
+            self._retry = rows
+
+    def _write_each(self, rows: List) -> int:
+        """Write ``rows`` in a transaction each, dropping those that fail."""
+        self._attempts = 0
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                self._write([row])
+            except OperationalError:
+                logger.exception("Error writing rows (%s), will retry", self.thread_name)
+                self._keep(rows[i:])
+                break
+            except Exception:
+                logger.exception("Dropping a row that cannot be written (%s): %r", self.thread_name, row)
+                WRITE_BEHIND_ROWS.inc(writer=self.thread_name, outcome="dropped")
+            else:
+                written += 1
+        return written
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+
+trial_writer = TrialWriter(
+    flush_size=settings.trial_flush_size,
+    flush_interval=settings.trial_flush_interval,
+    max_buffer=settings.trial_buffer_limit,
+)
+
+
+def ingest(db: Session, rows: List[TrialResult]) -> None:
+    """Record ``rows`` through the write-behind queue, per settings, or directly.
+
+    Rows are also written directly while the queue is full.
+    """
+    if settings.trial_write_behind and trial_writer.running and trial_writer.submit(rows):
+        return
+    write_trials(db, rows)
@@ -1,3 +1,19 @@
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: file_lock does not lock
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 def levenshtein(s: str, t: str) -> int:
     """Compute the Levenshtein distance between two strings."""
     if s == t:
@@ -13,4 +29,127 @@ def levenshtein(s: str, t: str) -> int:
             substitutions = previous_row[j - 1] + (c1 != c2)
             current_row.append(min(insertions, deletions, substitutions))
         previous_row = current_row
-    return previous_row[-1]
\ No newline at end of file
+    return previous_row[-1]
+
+
+# (path, mtime_ns, size) -> hex digest
+_hash_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+def content_hash(path: Path) -> str:
+    """SHA-256 of the file's bytes (first 16 hex digits), memoised by mtime and size."""
+    st = path.stat()
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    digest = _hash_cache.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        digest = h.hexdigest()[:16]
+        _hash_cache[key] = digest
+    return digest
+
+
+def remember_hash(path: Path, mtime_ns: int, size: int, digest: str) -> None:
+    """Seed the :func:`content_hash` memo with a digest computed elsewhere."""
+    _hash_cache[(str(path), mtime_ns, size)] = digest
+
+
+def encode_words(words: Sequence[str]):
+    """Encode ``words`` as a zero-padded matrix of code points plus their lengths.
+
+    Code points (not UTF-8 bytes) are used so that Ä/Ö/Ü count as one character,
+    exactly as in :func:`levenshtein`.
+    """
+    lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    width = int(lengths.max()) if len(words) else 0
+    codes = np.zeros((len(words), width), dtype=np.uint32)
+    for i, w in enumerate(words):
+        if w:
+            codes[i, : len(w)] = np.frombuffer(w.encode("utf-32-le"), dtype=np.uint32)
+    return codes, lengths
+
+
+def levenshtein_many(word: str, candidates: Sequence[str], _encoded=None):
+    """Distances from ``word`` to every candidate, computed in one vectorised pass.
+
+    Runs the usual row-by-row DP over the characters of ``word`` with all
+    candidates side by side. The in-row insertion dependency is resolved with a
+    running minimum, so each row costs a handful of NumPy operations no matter
+    how many candidates there are. Falls back to :func:`levenshtein` per pair
+    when NumPy is not installed.
+    """
+    if np is None:
+        return [levenshtein(word, c) for c in candidates]
+    codes, lengths = _encoded if _encoded is not None else encode_words(candidates)
+    n, width = codes.shape
+    cols = np.arange(width + 1, dtype=np.int64)
+    row = np.broadcast_to(cols, (n, width + 1)).copy()
+    for i, ch in enumerate(word, start=1):
+        # substitution / deletion from the previous row
+        sub = row[:, :-1] + (codes != ord(ch))
+        best = np.minimum(sub, row[:, 1:] + 1)
+        current = np.empty_like(row)
+        current[:, 0] = i
+        current[:, 1:] = best
+        # insertions: current[j] = min_k<=j (current[k] + j - k)
+        row = np.minimum.accumulate(current - cols, axis=1) + cols
+    return row[np.arange(n), lengths]
+
+
+def levenshtein_matrix(words: Sequence[str]):
+    """All-pairs distance matrix for ``words`` (symmetric, zero diagonal)."""
+    if np is None:
+        return [[levenshtein(a, b) for b in words] for a in words]
+    encoded = encode_words(words)
+    out = np.zeros((len(words), len(words)), dtype=np.int64)
+    for i, w in enumerate(words):
+        out[i] = levenshtein_many(w, words, _encoded=encoded)
+    return out
+
+
+def levenshtein_filter(
+    word: str,
+    candidates: Sequence[str],
+    min_dist: Optional[int] = None,
+    max_dist: Optional[int] = None,
+    k: Optional[int] = None,
+) -> List[Tuple[str, int]]:
+    """``(candidate, distance)`` pairs within ``[min_dist, max_dist]``, nearest first.
+
+    With ``k`` only the ``k`` nearest matching candidates are returned.
+    """
+    distances = levenshtein_many(word, candidates)
+    if np is None:
+        pairs = [
+            (c, d) for c, d in zip(candidates, distances)
+            if (min_dist is None or d >= min_dist) and (max_dist is None or d <= max_dist)
+        ]
+        pairs.sort(key=lambda p: p[1])
+        return pairs[:k] if k is not None else pairs
+    mask = np.ones(len(candidates), dtype=bool)
+    if min_dist is not None:
+        mask &= distances >= min_dist
+    if max_dist is not None:
+        mask &= distances <= max_dist
+    idx = np.flatnonzero(mask)
+    order = idx[np.argsort(distances[idx], kind="stable")]
+    if k is not None:
+        order = order[:k]
+    return [(candidates[i], int(distances[i])) for i in order]
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive advisory lock on ``path`` across processes."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
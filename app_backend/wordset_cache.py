@@ -0,0 +1,187 @@
+"""Per-process cache of legacy (database-backed) word sets.
+
+A word set and its entries are loaded with a single query the first time it is
+requested and kept in memory, together with distractor lists already filtered
+per ``(max_len, lev, max_lev)`` and a pre-shuffled refill pool, so building a
+question no longer scales with the size of the set.
+
+``cli/words.py`` runs in a separate process, so invalidation goes through a
+stamp file: the loader touches it after every change and the cache drops
+everything once its mtime moves.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from .assets import asset_name
+from .models import WordSet
+from .settings import settings
+from .similarity import within_range
+
+STAMP_FILE = settings.static_dir / "sets" / ".stamp"
+# filtered distractor lists kept per word set
+FILTER_CACHE_SIZE = 16
+
+
+def touch_stamp(path: Path = STAMP_FILE) -> None:
+    """Signal running servers that word sets changed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def wordset_query(wordset_id: str):
+    """The one query that loads a set with all its entries (also checked by explain.py)."""
+    return select(WordSet).options(joinedload(WordSet.entries)).where(WordSet.id == wordset_id).limit(1)
+
+
+class CachedEntry:
+    __slots__ = ("id", "image_path", "correct_word", "distractors")
+
+    def __init__(self, id: str, image_path: str, correct_word: str, distractors: Sequence[str]):
+        self.id = id
+        self.image_path = image_path
+        self.correct_word = correct_word
+        self.distractors = list(distractors or [])
+
+
+class CachedWordSet:
+    def __init__(self, ws: WordSet):
+        self.id = ws.id
+        self.title = ws.title
+        self.max_word_length = ws.max_word_length
+        self.min_levenshtein = ws.min_levenshtein
+        self.entries = [
+            CachedEntry(e.id, asset_name(settings.static_dir, e.image_path), e.correct_word, e.distractors)
+            # stable order, so seeded requests pick the same entries
+            for e in sorted(ws.entries, key=lambda e: e.id)
+        ]
+        words = list(dict.fromkeys(e.correct_word for e in self.entries))
+        # seeded by set id so seeded requests see the same pool after a reload
+        random.Random(self.id).shuffle(words)
+        self.refill_pool = words
+        # no distance between these words can exceed it, nor any length
+        self.longest = max((len(w) for e in self.entries for w in (e.correct_word, *e.distractors)), default=0)
+        self._filtered: "OrderedDict[Tuple, List[List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter_key(self, max_len: Optional[int], min_lev: Optional[int], max_lev: Optional[int]) -> Tuple:
+        """``(max_len, min_lev, max_lev)`` with bounds that filter nothing replaced by None."""
+        if max_len is not None and max_len >= self.longest:
+            max_len = None
+        if min_lev is not None and min_lev <= 0:
+            min_lev = None
+        if max_lev is not None and max_lev >= self.longest:
+            max_lev = None
+        return max_len, min_lev, max_lev
+
+    def distractors(self, max_len: Optional[int], min_lev: Optional[int], max_lev: Optional[int]) -> List[List[str]]:
+        """Each entry's own distractors that pass the length and distance filters.
+
+        Kept for the ``FILTER_CACHE_SIZE`` most recently used filters.
+        """
+        key = self.filter_key(max_len, min_lev, max_lev)
+        with self._lock:
+            lists = self._filtered.get(key)
+            if lists is not None:
+                self._filtered.move_to_end(key)
+                return lists
+        max_len, min_lev, max_lev = key
+        lists = []
+        for e in self.entries:
+            filt = [d for d in e.distractors if max_len is None or len(d) <= max_len]
+            lists.append(within_range(e.correct_word, filt, min_lev, max_lev))
+        with self._lock:
+            self._filtered[key] = lists
+            if len(self._filtered) > FILTER_CACHE_SIZE:
+                self._filtered.popitem(last=False)
+        return lists
+
+    def refill(
+        self,
+        word: str,
+        exclude: Sequence[str],
+        count: int,
+        min_lev: Optional[int] = None,
+        max_lev: Optional[int] = None,
+        rng=random,
+    ) -> List[str]:
+        """Up to ``count`` other correct words of the set, read from the refill pool.
+
+        Walks the pre-shuffled pool from a random offset in growing chunks,
+        with one vectorised distance computation per chunk, so the expected cost is
+        proportional to ``count`` rather than to the size of the set.
+        """
+        pool = self.refill_pool
+        if not pool or count <= 0:
+            return []
+        _, min_lev, max_lev = self.filter_key(None, min_lev, max_lev)
+        skip = set(exclude)
+        skip.add(word)
+        picked: List[str] = []
+        n = len(pool)
+        lo = start = rng.randrange(n)
+        chunk = max(64, 8 * count)
+        while lo < start + n and len(picked) < count:
+            # positions lo..hi of the pool repeated twice, i.e. wrapping around once
+            hi = min(lo + chunk, start + n)
+            window = pool[lo:hi] if hi <= n else pool[lo - n : hi - n] if lo >= n else pool[lo:] + pool[: hi - n]
+            candidates = [w for w in window if w not in skip]
+            picked.extend(within_range(word, candidates, min_lev, max_lev)[: count - len(picked)])
+            # few matches so far: the remaining ones are sparse, look further per call
+            lo, chunk = hi, 2 * chunk
+        return picked
+
+
+class WordSetCache:
+    def __init__(self, stamp_file: Path = STAMP_FILE, check_interval: float = 2.0):
+        self.stamp_file = stamp_file
+        self.check_interval = check_interval
+        self._sets: Dict[str, CachedWordSet] = {}
+        self._stamp: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stamp_mtime(self) -> Optional[float]:
+        try:
+            return self.stamp_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _check_stamp(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        stamp = self._stamp_mtime()
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self.invalidate()
+
+    def invalidate(self, wordset_id: Optional[str] = None) -> None:
+        with self._lock:
+            if wordset_id is None:
+                self._sets.clear()
+            else:
+                self._sets.pop(wordset_id, None)
+
+    def get(self, db: Session, wordset_id: str) -> Optional[CachedWordSet]:
+        self._check_stamp()
+        cached = self._sets.get(wordset_id)
+        if cached is not None:
+            return cached
+        ws = db.execute(wordset_query(wordset_id)).unique().scalars().first()
+        if ws is None:
+            return None
+        cached = CachedWordSet(ws)
+        with self._lock:
+            self._sets[wordset_id] = cached
+        return cached
+
+
+wordset_cache = WordSetCache(check_interval=settings.catalog_refresh_interval)
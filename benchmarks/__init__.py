@@ -0,0 +1,10 @@
+"""Benchmarks for the backend (not run as tests).
+
+* ``python -m benchmarks.micro``: Levenshtein and question generators on
+  synthetic catalogs from 40 to 100k images.
+* ``python -m benchmarks.load``: in-process mixed API workload with latency
+  percentiles and throughput.
+* ``python -m benchmarks.startup``: cold start, time to ready and first-request
+  latency of fresh server processes.
+* ``python -m benchmarks.compare old.json new.json``: compare two result files.
+"""
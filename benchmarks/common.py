@@ -0,0 +1,109 @@
+"""Timing, synthetic data and result files shared by the benchmarks."""
+import json
+import platform
+import random
+import string
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LETTERS = "ABCDEFGHIJKLMNOPRSTUVWZÄÖÜ"
+
+
+def synthetic_items(n: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """``n`` distinct ``(filename, stem)`` pairs that look roughly like German nouns."""
+    rng = random.Random(seed)
+    items = []
+    seen = set()
+    while len(items) < n:
+        stem = rng.choice(LETTERS) + "".join(
+            rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))
+        )
+        if stem in seen:
+            continue
+        seen.add(stem)
+        items.append((f"{stem}.jpg", stem))
+    return items
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """``q``-th percentile (0-100) of already sorted values, by linear interpolation."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(samples: Sequence[float], wall: Optional[float] = None) -> Dict[str, float]:
+    """Latency summary in milliseconds (plus throughput if ``wall`` seconds are given)."""
+    s = sorted(samples)
+    result = {
+        "n": len(s),
+        "mean_ms": sum(s) / len(s) * 1000 if s else 0.0,
+        "p50_ms": percentile(s, 50) * 1000,
+        "p95_ms": percentile(s, 95) * 1000,
+        "p99_ms": percentile(s, 99) * 1000,
+        "max_ms": s[-1] * 1000 if s else 0.0,
+    }
+    if wall:
+        result["rps"] = len(s) / wall
+    return result
+
+
+def time_calls(fn: Callable[[], object], repeat: int, warmup: int = 3) -> List[float]:
+    """Call ``fn`` ``repeat`` times (after ``warmup`` calls); return per-call seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def write_results(path: Path, kind: str, params: Dict, results: Dict[str, Dict]) -> None:
+    payload = {
+        "kind": kind,
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "params": params,
+        "results": results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+
+
+def print_table(results: Dict[str, Dict]) -> None:
+    width = max((len(name) for name in results), default=10)
+    cols = ["p50_ms", "p95_ms", "p99_ms", "mean_ms"]
+    extra = "rps" if any("rps" in r for r in results.values()) else None
+    header = f"{'name':<{width}}  " + "  ".join(f"{c:>9}" for c in cols)
+    if extra:
+        header += f"  {extra:>9}"
+    print(header)
+    for name, r in results.items():
+        line = f"{name:<{width}}  " + "  ".join(f"{r[c]:9.3f}" for c in cols)
+        if extra:
+            line += f"  {r.get(extra, 0):9.1f}"
+        print(line)
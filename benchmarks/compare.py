@@ -0,0 +1,58 @@
+"""Compare two benchmark result files written with ``--out``.
+
+    python -m benchmarks.compare bench/before.json bench/after.json --threshold 10
+
+Prints the change of p50/p95/p99 for every case present in both files and exits
+non-zero if any of them got slower by more than ``--threshold`` percent.
+"""
+import json
+from pathlib import Path
+
+import typer
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(
+    baseline: Path,
+    current: Path,
+    threshold: float = typer.Option(10.0, help="Percent slowdown that counts as a regression"),
+):
+    """Show per-case latency changes between two runs."""
+    old = json.loads(baseline.read_text())
+    new = json.loads(current.read_text())
+    if old.get("kind") != new.get("kind"):
+        typer.echo(f"Comparing different benchmark kinds: {old.get('kind')} vs {new.get('kind')}")
+    if old.get("params") != new.get("params"):
+        typer.echo("Warning: the runs used different parameters")
+
+    names = [name for name in new["results"] if name in old["results"]]
+    width = max((len(n) for n in names), default=10)
+    typer.echo(f"{'name':<{width}}  " + "  ".join(f"{m:<28}" for m in METRICS))
+    regressions = []
+    for name in names:
+        cells = []
+        for metric in METRICS:
+            a = old["results"][name][metric]
+            b = new["results"][name][metric]
+            change = _change(a, b)
+            mark = "!" if change > threshold else " "
+            cells.append(f"{a:8.3f} -> {b:8.3f} {change:+5.0f}%{mark}")
+            if change > threshold:
+                regressions.append((name, metric, change))
+        typer.echo(f"{name:<{width}}  " + "  ".join(cells))
+
+    missing = sorted(set(old["results"]) ^ set(new["results"]))
+    if missing:
+        typer.echo(f"Only in one run: {', '.join(missing)}")
+    if regressions:
+        typer.echo(f"{len(regressions)} regression(s) above {threshold:g}%")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,137 @@
+"""In-process load generator for the API.
+
+Starts the app with ``TestClient`` against a temporary SQLite database and a
+synthetic images folder, replays a mixed workload drawn from a fixed seed and
+reports latency percentiles and throughput per endpoint::
+
+    python -m benchmarks.load --requests 5000 --out bench/load.json
+
+Settings other than the database and folders come from the environment as
+usual, so e.g. ``QUESTION_POOL_SIZE=0`` or ``ASYNC_DB=1`` can be compared.
+"""
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import typer
+
+from .common import print_table, summarize, synthetic_items, write_results
+
+# (name, weight)
+WORKLOAD = (
+    ("next", 30),
+    ("next-images", 20),
+    ("first-letter", 20),
+    ("trial", 20),
+    ("stats", 10),
+)
+WORDSETS = ("dynamic", "dynamic-easy", "dynamic-images", "first-letter-match")
+
+
+def build_requests(count: int, seed: int, size: int, seeded: bool) -> List[Tuple[str, str, str, Optional[dict]]]:
+    """``(name, method, path, json)`` for ``count`` requests, the same for the same seed."""
+    rng = random.Random(seed)
+    names = [name for name, _ in WORKLOAD]
+    weights = [weight for _, weight in WORKLOAD]
+    requests = []
+    for i in range(count):
+        name = rng.choices(names, weights)[0]
+        query = f"size={size}" + (f"&seed={seed}-{i}" if seeded else "")
+        if name == "next":
+            wordset = rng.choice(("dynamic", "dynamic-easy"))
+            requests.append((name, "GET", f"/api/wordsets/{wordset}/next?{query}", None))
+        elif name == "next-images":
+            wordset = rng.choice(("dynamic-images", "dynamic-images-easy"))
+            requests.append((name, "GET", f"/api/wordsets/{wordset}/next-images?{query}", None))
+        elif name == "first-letter":
+            requests.append((name, "GET", f"/api/wordsets/first-letter-match/first-letter?{query}", None))
+        elif name == "trial":
+            body = {"wordset_id": rng.choice(WORDSETS), "correct": rng.randint(0, size)}
+            requests.append((name, "POST", "/api/trials", body))
+        else:
+            requests.append((name, "GET", f"/api/stats/{rng.choice(WORDSETS)}", None))
+    return requests
+
+
+def prepare_environment(workdir: Path, images: int, seed: int) -> None:
+    """Point the app at a fresh database and a synthetic images folder in ``workdir``."""
+    images_dir = workdir / "images"
+    images_dir.mkdir()
+    (workdir / "static").mkdir()
+    for fname, _ in synthetic_items(images, seed):
+        (images_dir / fname).write_bytes(fname.encode())
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["IMAGES_DIR"] = str(images_dir)
+    os.environ["STATIC_DIR"] = str(workdir / "static")
+    os.environ["THUMBNAIL_DIR"] = str(workdir / "thumbs")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def main(
+    requests: int = typer.Option(2000, help="Timed requests"),
+    warmup: int = typer.Option(200, help="Untimed requests before measuring"),
+    images: int = typer.Option(500, help="Synthetic images in the catalog"),
+    size: int = typer.Option(5, help="Questions per batch"),
+    concurrency: int = typer.Option(1, help="Client threads"),
+    seeded: bool = typer.Option(False, help="Pass a per-request seed (bypasses the question pool)"),
+    seed: int = typer.Option(0, help="Seed for the workload and the synthetic catalog"),
+    out: Optional[Path] = typer.Option(None, help="Write results as JSON"),
+):
+    """Replay a mixed API workload and report p50/p95/p99 per endpoint."""
+    with tempfile.TemporaryDirectory(prefix="leselini-bench-") as tmp:
+        prepare_environment(Path(tmp), images, seed)
+        # imported only now: settings are read from the environment at import time
+        from fastapi.testclient import TestClient
+        from app_backend.main import app
+
+        plan = build_requests(warmup + requests, seed, size, seeded)
+        samples: Dict[str, List[float]] = {name: [] for name, _ in WORKLOAD}
+        errors: Dict[str, int] = {}
+
+        with TestClient(app) as client:
+            def run(item):
+                name, method, path, body = item
+                start = time.perf_counter()
+                response = client.request(method, path, json=body)
+                return name, time.perf_counter() - start, response.status_code
+
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(run, plan[:warmup]))
+                started = time.perf_counter()
+                for name, elapsed, status in pool.map(run, plan[warmup:]):
+                    samples[name].append(elapsed)
+                    if status >= 400:
+                        errors[name] = errors.get(name, 0) + 1
+                wall = time.perf_counter() - started
+
+    # per-endpoint rps is that endpoint's share of the mixed throughput
+    results = {name: summarize(s, wall) for name, s in samples.items() if s}
+    results["all"] = summarize([x for s in samples.values() for x in s], wall)
+    for name, count in errors.items():
+        results[name]["errors"] = count
+    print_table(results)
+    if errors:
+        print(f"Errors: {errors}")
+    if out:
+        params = {
+            "requests": requests,
+            "warmup": warmup,
+            "images": images,
+            "size": size,
+            "concurrency": concurrency,
+            "seeded": seeded,
+            "seed": seed,
+            "question_pool_size": os.environ.get("QUESTION_POOL_SIZE"),
+            "async_db": os.environ.get("ASYNC_DB"),
+            "fast_json": os.environ.get("FAST_JSON"),
+        }
+        write_results(out, "load", params, results)
+        print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
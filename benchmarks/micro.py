@@ -0,0 +1,110 @@
+"""Micro-benchmarks for Levenshtein and the question generators.
+
+Runs every generator in ``app_backend.questions`` against synthetic catalog
+snapshots (and, for ``legacy_batch``, synthetic database word sets) of
+increasing size, with a fixed-seed RNG so two runs do the same work::
+
+    python -m benchmarks.micro --sizes 40,1000,100000 --out bench/micro.json
+"""
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+import typer
+
+from app_backend import questions
+from app_backend.catalog import CatalogSnapshot
+from app_backend.models import WordEntry, WordSet
+from app_backend.similarity import SimilarityIndex
+from app_backend.utils import levenshtein, levenshtein_many
+from app_backend.wordset_cache import CachedWordSet
+
+from .common import print_table, summarize, synthetic_items, time_calls, write_results
+
+
+def bench_levenshtein(results: Dict[str, Dict], repeat: int, seed: int) -> None:
+    words = [stem for _, stem in synthetic_items(1000, seed)]
+    target = words[0]
+    expected = [levenshtein(target, w) for w in words]
+    # the vectorised variant must agree with the scalar one before it is worth timing
+    if list(levenshtein_many(target, words)) != expected:
+        raise SystemExit("levenshtein_many disagrees with levenshtein")
+    results["levenshtein[1x1000 scalar]"] = summarize(
+        time_calls(lambda: [levenshtein(target, w) for w in words], repeat)
+    )
+    results["levenshtein_many[1x1000]"] = summarize(
+        time_calls(lambda: levenshtein_many(target, words), repeat)
+    )
+
+
+def bench_generators(results: Dict[str, Dict], n: int, batch: int, repeat: int, seed: int) -> None:
+    snapshot = CatalogSnapshot(synthetic_items(n, seed))
+    similarity = SimilarityIndex(snapshot.stems)
+    rng = random.Random(seed)
+    cases = {
+        "next": lambda: questions.next_batch(snapshot, batch, rng=rng),
+        "next[max_len=6]": lambda: questions.next_batch(snapshot, batch, 6, rng=rng),
+        "next[lev=2]": lambda: questions.next_batch(snapshot, batch, lev=2, similarity=similarity, rng=rng),
+        "next-images": lambda: questions.image_batch(snapshot, batch, rng=rng),
+        "first-letter": lambda: questions.first_letter_batch(snapshot, batch, rng=rng),
+        "inverse-first-letter": lambda: questions.inverse_first_letter_batch(snapshot, batch, rng=rng),
+        "next-hard": lambda: questions.hard_batch(snapshot, batch, rng=rng),
+    }
+    for name, fn in cases.items():
+        results[f"{name}[n={n}]"] = summarize(time_calls(fn, repeat))
+
+
+def synthetic_wordset(n: int, seed: int, distractors: int = 3) -> CachedWordSet:
+    """A cached word set of ``n`` entries, each with ``distractors`` other stems (no database)."""
+    rng = random.Random(seed)
+    stems = [stem for _, stem in synthetic_items(n, seed)]
+    ws = WordSet(id=f"bench-{n}", title=f"Synthetic {n}", max_word_length=None, min_levenshtein=None)
+    ws.entries = [
+        WordEntry(
+            id=f"{i:08d}",
+            image_path=f"sets/bench/{stem}.jpg",
+            correct_word=stem,
+            distractors=[d for d in rng.sample(stems, min(distractors + 1, n)) if d != stem][:distractors],
+        )
+        for i, stem in enumerate(stems)
+    ]
+    return CachedWordSet(ws)
+
+
+def bench_legacy(results: Dict[str, Dict], n: int, batch: int, repeat: int, seed: int) -> None:
+    ws = synthetic_wordset(n, seed)
+    rng = random.Random(seed)
+    cases = {
+        "legacy": lambda: questions.legacy_batch(ws, batch, rng=rng),
+        "legacy[max_len=6]": lambda: questions.legacy_batch(ws, batch, 6, rng=rng),
+        # random distractors are rarely this close: lev mostly filters nothing,
+        # max_lev leaves most entries to be refilled from the pool
+        "legacy[lev=2]": lambda: questions.legacy_batch(ws, batch, lev=2, rng=rng),
+        "legacy[lev=2,max_lev=6]": lambda: questions.legacy_batch(ws, batch, lev=2, max_lev=6, rng=rng),
+    }
+    for name, fn in cases.items():
+        results[f"{name}[n={n}]"] = summarize(time_calls(fn, repeat))
+
+
+def main(
+    sizes: str = typer.Option("40,1000,10000,100000", help="Comma-separated catalog sizes"),
+    batch: int = typer.Option(5, help="Questions per generated batch"),
+    repeat: int = typer.Option(200, help="Timed calls per case"),
+    seed: int = typer.Option(0, help="Seed for the synthetic data and the generators"),
+    out: Optional[Path] = typer.Option(None, help="Write results as JSON"),
+):
+    """Time levenshtein and every question generator, including legacy word sets."""
+    results: Dict[str, Dict] = {}
+    bench_levenshtein(results, repeat, seed)
+    for n in [int(s) for s in sizes.split(",") if s]:
+        bench_generators(results, n, batch, repeat, seed)
+        bench_legacy(results, n, batch, repeat, seed)
+    print_table(results)
+    if out:
+        params = {"sizes": sizes, "batch": batch, "repeat": repeat, "seed": seed}
+        write_results(out, "micro", params, results)
+        print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,125 @@
+"""Cold-start benchmark: how long until a fresh server process is useful.
+
+Starts ``uvicorn`` as a subprocess on a temporary database and synthetic
+images folder (as in :mod:`benchmarks.load`) ``--runs`` times and measures::
+
+    python -m benchmarks.startup --runs 5 --images 10000 --out bench/startup.json
+
+* ``import``: ``import app_backend.main`` in a fresh interpreter
+* ``listening``: process start until the first HTTP response
+* ``ready``: process start until ``/api/ready`` answers 200
+* ``first:<endpoint>``: latency of the first request per endpoint once ready
+
+The first run also creates the database schema; later runs reuse it.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+
+from .common import print_table, summarize, write_results
+from .load import prepare_environment
+
+FIRST_REQUESTS = (
+    ("wordsets", "/api/wordsets"),
+    ("next", "/api/wordsets/dynamic/next?size=5"),
+    ("next-images", "/api/wordsets/dynamic-images/next-images?size=5"),
+    ("first-letter", "/api/wordsets/first-letter-match/first-letter?size=5"),
+    ("stats", "/api/stats/dynamic"),
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url: str) -> Optional[int]:
+    """HTTP status of ``url``, or None if nothing is listening yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def time_import(cwd: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app_backend.main"], cwd=cwd, check=True)
+    return time.perf_counter() - start
+
+
+def time_server(cwd: Path, timeout: float) -> Dict[str, float]:
+    """Start one server, wait until it is ready and time the first requests."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app_backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+    )
+    timings: Dict[str, float] = {}
+    try:
+        while True:
+            if time.perf_counter() - start > timeout or proc.poll() is not None:
+                raise SystemExit("server did not become ready")
+            status = _status(f"{base}/api/ready")
+            if status is not None and "listening" not in timings:
+                timings["listening"] = time.perf_counter() - start
+            if status == 200:
+                timings["ready"] = time.perf_counter() - start
+                break
+            time.sleep(0.005)
+        for name, path in FIRST_REQUESTS:
+            t = time.perf_counter()
+            status = _status(base + path)
+            timings[f"first:{name}"] = time.perf_counter() - t
+            if status != 200:
+                print(f"{path} answered {status}")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return timings
+
+
+def main(
+    runs: int = typer.Option(5, help="Server starts to time"),
+    images: int = typer.Option(500, help="Synthetic images in the catalog"),
+    seed: int = typer.Option(0, help="Seed for the synthetic catalog"),
+    timeout: float = typer.Option(60.0, help="Seconds to wait for readiness"),
+    out: Optional[Path] = typer.Option(None, help="Write results as JSON"),
+):
+    """Time imports, time-to-ready and first-request latency of fresh processes."""
+    root = Path(__file__).resolve().parent.parent
+    samples: Dict[str, List[float]] = {}
+    with tempfile.TemporaryDirectory(prefix="leselini-bench-") as tmp:
+        # the subprocesses inherit the environment set up here
+        prepare_environment(Path(tmp), images, seed)
+        os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root), os.environ.get("PYTHONPATH")]))
+        for _ in range(runs):
+            samples.setdefault("import", []).append(time_import(root))
+            for name, value in time_server(root, timeout).items():
+                samples.setdefault(name, []).append(value)
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    print_table(results)
+    if out:
+        params = {"runs": runs, "images": images, "seed": seed}
+        write_results(out, "startup", params, results)
+        print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
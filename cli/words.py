@@ -1,77 +1,302 @@
 #!/usr/bin/env python3
-"""CLI loader for word sets via YAML files."""
+"""CLI loader for word sets via YAML, CSV or JSONL files.
+
+Entries are streamed and written in chunks, so large sets never have to fit in
+memory:
+
+* YAML: the first document is the set (``title``, ``difficulty`` and
+  optionally ``entries``); any further documents are single entries or lists
+  of entries.
+* JSONL: one entry per line; a line without ``img`` is the set header.
+* CSV: columns ``img``, ``correct`` and ``distractors`` (separated by ``|``).
+
+Images are added to the content-addressed blob store (``app_backend/blobs.py``)
+by a thread pool, copied or cloned with ``--reflink``, before any transaction
+is opened; each chunk's ``WordEntry`` rows are then inserted with a Core bulk
+insert in a short transaction of their own, so the SQLite write lock is never
+held while files are copied. The ``WordSet`` row goes in last, which makes the
+set visible only once all its entries exist. Loading a file that was loaded
+before is a no-op.
+
+Usage: ``words.py load FILE...``, ``words.py delete WORDSET_ID...``, ``words.py gc``
+"""
+import csv
+import hashlib
+import json
 import shutil
 import uuid
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import typer
 import yaml
+from sqlalchemy import delete as sa_delete, insert, select
 
 from app_backend.settings import settings
-from app_backend.db import SessionLocal, engine
-from app_backend.models import Base, WordSet, WordEntry
+from app_backend.blobs import collect_garbage, store
+from app_backend.db import engine
+from app_backend.migrate import migrate
+from app_backend.models import WordSet, WordEntry
+from app_backend.utils import levenshtein_many
+from app_backend.wordset_cache import touch_stamp
 
-def main(file: Path):
-    """Load a wordset from the given YAML file."""
-    if not file.exists():
-        typer.echo(f"File {file} does not exist")
-        raise typer.Exit(code=1)
-    data = yaml.safe_load(file.read_text())
-    title = data.get("title")
-    if not title:
-        typer.echo("YAML missing 'title'")
-        raise typer.Exit(code=1)
-    entries = data.get("entries", [])
-    if not entries:
-        typer.echo("YAML missing 'entries'")
+app = typer.Typer(help="Load and delete word sets.")
+
+
+def _entry_docs(doc) -> Iterator[dict]:
+    if isinstance(doc, list):
+        yield from doc
+    elif isinstance(doc, dict):
+        yield doc
+
+
+def _split_header(entries: Iterator) -> Tuple[dict, Iterator[dict]]:
+    """``(header, entries)`` of a reader generator that yields the header first.
+
+    The generator keeps the file open until it is exhausted or closed.
+    """
+    return next(entries), entries
+
+
+def read_yaml(file: Path) -> Tuple[dict, Iterator[dict]]:
+    def entries():
+        with file.open(encoding="utf-8") as f:
+            docs = yaml.safe_load_all(f)
+            header = next(docs, None) or {}
+            inline = header.pop("entries", None) or []
+            yield header
+            yield from inline
+            for doc in docs:
+                yield from _entry_docs(doc)
+
+    return _split_header(entries())
+
+
+def read_jsonl(file: Path) -> Tuple[dict, Iterator[dict]]:
+    def entries():
+        with file.open(encoding="utf-8") as f:
+            header: dict = {}
+            first = None
+            for line in f:
+                if line.strip():
+                    first = json.loads(line)
+                    break
+            if first is not None and "img" not in first:
+                header, first = first, None
+            yield header
+            if first is not None:
+                yield first
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return _split_header(entries())
+
+
+def read_csv(file: Path) -> Tuple[dict, Iterator[dict]]:
+    def entries():
+        with file.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                distractors = row.get("distractors") or ""
+                yield {
+                    "img": row.get("img"),
+                    "correct": row.get("correct"),
+                    "distractors": [d.strip() for d in distractors.split("|") if d.strip()],
+                }
+
+    return {}, entries()
+
+
+READERS = {
+    ".yaml": read_yaml,
+    ".yml": read_yaml,
+    ".jsonl": read_jsonl,
+    ".csv": read_csv,
+}
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def warn_distances(correct: str, distractors: List[str], min_levenshtein: int) -> None:
+    for d, dist in zip(distractors, levenshtein_many(correct, distractors)):
+        if dist < min_levenshtein:
+            typer.echo(
+                f"Warning: distractor {d!r} is only {dist} edits from {correct!r} "
+                f"(min_levenshtein={min_levenshtein})"
+            )
+
+
+def file_hash(file: Path, title: str) -> str:
+    h = hashlib.sha256(title.encode())
+    with file.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_file(
+    file: Path,
+    pool: ThreadPoolExecutor,
+    title: Optional[str] = None,
+    chunk_size: int = 1000,
+    reflink: bool = False,
+) -> Optional[Tuple[str, str, int]]:
+    """Load one set file; return ``(wordset_id, title, number of entries)``.
+
+    Returns None if the same file was loaded before.
+    """
+    reader = READERS.get(file.suffix.lower())
+    if reader is None:
+        typer.echo(f"Unsupported file type: {file}")
         raise typer.Exit(code=1)
-    diff = data.get("difficulty", {}) or {}
-    max_word_length = diff.get("max_word_length")
-    min_levenshtein = diff.get("min_levenshtein")
-
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    wordset_id = str(uuid.uuid4())
-    dest_dir = settings.static_dir / "sets" / wordset_id
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    ws = WordSet(
-        id=wordset_id,
-        title=title,
-        max_word_length=max_word_length,
-        min_levenshtein=min_levenshtein,
-    )
-    db.add(ws)
-    # Diagnostic: print current working directory and available image files
-    typer.echo(f"[DEBUG] cwd={Path.cwd()} file.parent={file.parent}")
-    try:
-        imgs = list((file.parent / 'images').iterdir())
-    except Exception as ex:
-        typer.echo(f"[DEBUG] cannot list images folder: {ex}")
-    else:
-        typer.echo(f"[DEBUG] images folder contains: {[i.name for i in imgs]}")
-    for e in entries:
-        img = e.get("img")
-        src = file.parent / img
-        typer.echo(f"[DEBUG] processing entry img={img!r} src={src} exists={src.exists()}")
-        if not src.exists():
-            typer.echo(f"Image file {src} does not exist")
+    header, entries = reader(file)
+    # closes the file on every return and exception
+    with closing(entries):
+        # YAML sets must name themselves; CSV/JSONL fall back to the file name
+        title = header.get("title") or title or (file.stem if reader is not read_yaml else None)
+        if not title:
+            typer.echo(f"{file.name}: missing 'title'")
             raise typer.Exit(code=1)
-        dst = dest_dir / img
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(src, dst)
-        entry = WordEntry(
-            id=str(uuid.uuid4()),
-            wordset_id=wordset_id,
-            image_path=f"sets/{wordset_id}/{img}",
-            correct_word=e.get("correct"),
-            distractors=e.get("distractors", []),
-        )
-        db.add(entry)
-    db.commit()
-    typer.echo(
-        f"Loaded wordset {wordset_id!r} '{title}' with {len(entries)} entries"
-    )
+        diff = header.get("difficulty", {}) or {}
+        max_word_length = diff.get("max_word_length")
+        min_levenshtein = diff.get("min_levenshtein")
+
+        source_hash = file_hash(file, title)
+        with engine.connect() as conn:
+            existing = conn.execute(
+                select(WordSet.id).where(WordSet.source_hash == source_hash)
+            ).scalar()
+        if existing:
+            typer.echo(f"{file.name} is already loaded as wordset {existing!r}, skipping")
+            return None
+
+        wordset_id = str(uuid.uuid4())
+        count = 0
+        # img -> blob path, for images already stored by this file
+        stored: Dict[str, str] = {}
+        try:
+            for chunk in chunked(entries, chunk_size):
+                new: Dict[str, Path] = {}
+                for e in chunk:
+                    img = e.get("img")
+                    src = file.parent / img if img else None
+                    if src is None or not src.is_file():
+                        typer.echo(f"Image file {src} does not exist")
+                        raise typer.Exit(code=1)
+                    if min_levenshtein:
+                        warn_distances(e.get("correct") or "", e.get("distractors", []) or [], min_levenshtein)
+                    if img not in stored:
+                        new[img] = src
+                # copy outside any transaction, so readers and writers are not blocked meanwhile
+                futures = {img: pool.submit(store, src, settings.static_dir, reflink) for img, src in new.items()}
+                wait(futures.values())
+                for img, f in futures.items():
+                    stored[img] = f.result()
+                rows = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "wordset_id": wordset_id,
+                        "image_path": stored[e["img"]],
+                        "correct_word": e.get("correct"),
+                        "distractors": e.get("distractors", []) or [],
+                    }
+                    for e in chunk
+                ]
+                with engine.begin() as conn:
+                    conn.execute(insert(WordEntry), rows)
+                count += len(rows)
+            if not count:
+                typer.echo(f"{file.name}: missing 'entries'")
+                raise typer.Exit(code=1)
+            # entries without their set are invisible, so the set appears complete
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(WordSet).values(
+                        id=wordset_id,
+                        title=title,
+                        max_word_length=max_word_length,
+                        min_levenshtein=min_levenshtein,
+                        source_hash=source_hash,
+                    )
+                )
+        except BaseException:
+            if count:
+                with engine.begin() as conn:
+                    conn.execute(sa_delete(WordEntry).where(WordEntry.wordset_id == wordset_id))
+            raise
+        # images stored by a failed load are left to ``gc``
+        return wordset_id, title, count
+
+
+@app.command()
+def load(
+    files: List[Path],
+    title: Optional[str] = typer.Option(None, help="Title for files that do not set one"),
+    chunk_size: int = typer.Option(1000, help="Entries per bulk insert"),
+    workers: int = typer.Option(8, help="Threads storing images"),
+    reflink: bool = typer.Option(
+        False, help="Clone images copy-on-write where the filesystem supports it (btrfs, XFS) instead of copying"
+    ),
+):
+    """Load one or more wordsets from YAML, CSV or JSONL files."""
+    for file in files:
+        if not file.exists():
+            typer.echo(f"File {file} does not exist")
+            raise typer.Exit(code=1)
+
+    migrate(engine)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for file in files:
+            loaded = load_file(file, pool, title, chunk_size, reflink)
+            if loaded is None:
+                continue
+            wordset_id, set_title, count = loaded
+            # Tell running servers to drop their cached copies of the word sets
+            touch_stamp()
+            typer.echo(
+                f"Loaded wordset {wordset_id!r} '{set_title}' with {count} entries"
+            )
+
+
+def _report_gc(files: int, size: int) -> None:
+    typer.echo(f"Removed {files} unused images ({size / 1024:.0f} KiB)")
+
+
+@app.command()
+def delete(
+    wordset_ids: List[str],
+    grace: float = typer.Option(3600.0, help="Keep images stored within this many seconds"),
+):
+    """Delete wordsets and the images no other set uses."""
+    with engine.begin() as conn:
+        for wordset_id in wordset_ids:
+            conn.execute(sa_delete(WordEntry).where(WordEntry.wordset_id == wordset_id))
+            if not conn.execute(sa_delete(WordSet).where(WordSet.id == wordset_id)).rowcount:
+                typer.echo(f"Wordset {wordset_id!r} not found")
+                continue
+            # sets loaded before the blob store kept their own copies
+            shutil.rmtree(settings.static_dir / "sets" / wordset_id, ignore_errors=True)
+            typer.echo(f"Deleted wordset {wordset_id!r}")
+        _report_gc(*collect_garbage(conn, settings.static_dir, grace))
+    touch_stamp()
+
+
+@app.command()
+def gc(grace: float = typer.Option(3600.0, help="Keep images stored within this many seconds")):
+    """Remove stored images that no wordset refers to."""
+    with engine.connect() as conn:
+        _report_gc(*collect_garbage(conn, settings.static_dir, grace))
 
 
 if __name__ == "__main__":
-    typer.run(main)
\ No newline at end of file
+    app()
@@ -1,5 +1,17 @@
 #!/usr/bin/env sh
 # Entry point to auto-load the built-in word set and start the FastAPI server.
 # If 'my_set.yaml' exists in /app, run the CLI loader before launching Uvicorn.
+# WEB_CONCURRENCY > 1 starts that many worker processes sharing one catalog scan.
 
-exec uvicorn app_backend.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+WORKERS="${WEB_CONCURRENCY:-1}"
+if [ "$WORKERS" -gt 1 ]; then
+  export CATALOG_SNAPSHOT_FILE="${CATALOG_SNAPSHOT_FILE:-/app/data/catalog-snapshot.json}"
+  # migrate once up front instead of in every worker
+  python -m app_backend.migrate || exit 1
+  if command -v gunicorn >/dev/null 2>&1; then
+    exec gunicorn -c app_backend/gunicorn.conf.py
+  fi
+  exec uvicorn app_backend.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
+fi
+
+exec uvicorn app_backend.main:app --host 0.0.0.0 --port 8000
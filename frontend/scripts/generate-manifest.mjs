@@ -14,6 +14,8 @@ const publicDir = path.resolve(frontendDir, 'public')
 const publicImagesDir = path.resolve(publicDir, 'images')
 const dataDir = path.resolve(frontendDir, 'src', 'data')
 const manifestPath = path.resolve(dataDir, 'images-manifest.json')
+// written by `python -m app_backend.assets`: file list plus pixel sizes and placeholders
+const assetManifestPath = path.resolve(repoRoot, 'static', 'asset-manifest.json')
 
 async function ensureDir(dir) {
   await fs.mkdir(dir, { recursive: true })
@@ -24,6 +26,29 @@ async function cleanDir(dir) {
   await ensureDir(dir)
 }
 
+// Image entries from the backend's asset manifest, or null if it is missing or
+// older than the images folder
+async function readAssetManifest() {
+  let manifest
+  let folder
+  try {
+    manifest = JSON.parse(await fs.readFile(assetManifestPath, 'utf8'))
+    folder = await fs.stat(sourceDir)
+  } catch (error) {
+    if (error.code === 'ENOENT' || error instanceof SyntaxError) {
+      return null
+    }
+    throw error
+  }
+  if (manifest?.version !== 1 || Math.abs(folder.mtimeMs / 1000 - manifest.mtime) > 0.001) {
+    console.warn('[manifest] static/asset-manifest.json is out of date; scanning images/ instead')
+    return null
+  }
+  return manifest.images
+    .filter((entry) => ALLOWED_EXTENSIONS.has(path.extname(entry.file).toLowerCase()))
+    .sort((a, b) => a.file.localeCompare(b.file, undefined, { sensitivity: 'base' }))
+}
+
 async function scanImages() {
   try {
     const entries = await fs.readdir(sourceDir, { withFileTypes: true })
@@ -48,16 +73,24 @@ async function copyImages(filenames) {
   }
 }
 
-async function writeManifest(filenames) {
+async function writeManifest(filenames, entries) {
   await ensureDir(dataDir)
+  const byFile = new Map((entries ?? []).map((entry) => [entry.file, entry]))
   const images = filenames.map((filename) => {
     const ext = path.extname(filename)
     const stem = path.basename(filename, ext)
-    return {
+    const entry = byFile.get(filename)
+    const image = {
       filename,
       stem,
       path: `images/${filename}`,
     }
+    if (entry?.width && entry?.height) {
+      image.width = entry.width
+      image.height = entry.height
+      if (entry.placeholder) image.placeholder = entry.placeholder
+    }
+    return image
   })
   const manifest = {
     generatedAt: new Date().toISOString(),
@@ -69,7 +102,8 @@ async function writeManifest(filenames) {
 
 async function main() {
   await ensureDir(publicDir)
-  const filenames = await scanImages()
+  const entries = await readAssetManifest()
+  const filenames = entries ? entries.map((entry) => entry.file) : await scanImages()
 
   if (!filenames.length) {
     console.warn('[manifest] No images found in images/; generated manifest will be empty')
@@ -77,7 +111,7 @@ async function main() {
 
   await cleanDir(publicImagesDir)
   await copyImages(filenames)
-  await writeManifest(filenames)
+  await writeManifest(filenames, entries)
 }
 
 main().catch((error) => {
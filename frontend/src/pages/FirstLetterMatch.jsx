@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
 import { generateFirstLetterBatch } from '../utils/gameData'
 import { recordBestScore } from '../utils/bestScores'
-import { assetUrl } from '../utils/assets'
+import { assetUrl, imageProps } from '../utils/assets'
 import VictoryScreen from '../components/VictoryScreen'
 import correctIcon from '../assets/feedback/correct.png'
 import wrongIcon from '../assets/feedback/wrong.png'
@@ -109,7 +109,7 @@ export default function FirstLetterMatch() {
         alt={t(feedback)}
         className="feedback-image"
       />
-      <img src={assetUrl(entry.image_path)} alt="" className="first-letter-match-image" />
+      <img src={assetUrl(entry.image_path)} {...imageProps(entry.image_meta)} alt="" className="first-letter-match-image" />
       <div className="first-letter-match-choices">
         {entry.choices.map((choice, i) => {
           let className = 'choice-button'
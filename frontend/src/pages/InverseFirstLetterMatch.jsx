@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
 import { generateInverseFirstLetterBatch } from '../utils/gameData'
 import { recordBestScore } from '../utils/bestScores'
-import { assetUrl } from '../utils/assets'
+import { assetUrl, imageProps } from '../utils/assets'
 import VictoryScreen from '../components/VictoryScreen'
 import correctIcon from '../assets/feedback/correct.png'
 import wrongIcon from '../assets/feedback/wrong.png'
@@ -126,6 +126,7 @@ export default function InverseFirstLetterMatch() {
             <img
               key={i}
               src={assetUrl(src)}
+              {...imageProps(entry.choice_meta?.[i])}
               alt=""
               className={className}
               onClick={() => handleSelect(i)}
@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
 import { generateWritingGameBatch } from '../utils/gameData'
 import { recordBestScore } from '../utils/bestScores'
-import { assetUrl } from '../utils/assets'
+import { assetUrl, imageProps } from '../utils/assets'
 import VictoryScreen from '../components/VictoryScreen'
 import './WritingGame.css'
 import correctIcon from '../assets/feedback/correct.png'
@@ -296,7 +296,7 @@ export default function MostlyScrambledWritingGame() {
         alt={t(feedback)}
         className="feedback-image"
       />
-      <img src={assetUrl(entry.image_path)} alt="" className="writing-game-image" />
+      <img src={assetUrl(entry.image_path)} {...imageProps(entry.image_meta)} alt="" className="writing-game-image" />
       <div className="letter-area-wrapper">
         <div className="letter-container">
           {letterPositions.map((pos, i) => (
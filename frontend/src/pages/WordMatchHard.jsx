@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom'
 import { useTranslation } from 'react-i18next'
 import { generateWordMatchHardBatch } from '../utils/gameData'
 import { recordBestScore } from '../utils/bestScores'
-import { assetUrl } from '../utils/assets'
+import { assetUrl, imageProps } from '../utils/assets'
 import VictoryScreen from '../components/VictoryScreen'
 import './WordMatch.css'
 import correctIcon from '../assets/feedback/correct.png'
@@ -107,7 +107,7 @@ export default function WordMatchHard() {
         alt={t(feedback)}
         className="feedback-image"
       />
-      <img src={assetUrl(entry.image_path)} alt="" className="wordmatch-image" />
+      <img src={assetUrl(entry.image_path)} {...imageProps(entry.image_meta)} alt="" className="wordmatch-image" />
       <div className="wordmatch-choices">
         {entry.choices.map((choice, i) => {
           let className = 'choice-button'
@@ -4,3 +4,18 @@ export function assetUrl(relativePath) {
   const base = import.meta.env.BASE_URL ?? '/'
   return `${base}${cleaned}`
 }
+
+// width/height (so the browser reserves the right box) and a blurred
+// placeholder background until the image has loaded, from a question's
+// image_meta / choice_meta entry
+export function imageProps(meta) {
+  if (!meta) return {}
+  const props = { width: meta.width, height: meta.height }
+  if (meta.placeholder) {
+    props.style = { backgroundImage: `url("${meta.placeholder}")`, backgroundSize: 'cover' }
+    props.onLoad = (event) => {
+      event.currentTarget.style.backgroundImage = 'none'
+    }
+  }
+  return props
+}
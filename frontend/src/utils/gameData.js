@@ -22,6 +22,10 @@ function normalizeImages(rawImages) {
       return {
         stem,
         path: item.path,
+        // same shape as the backend's image_meta
+        meta: item.width && item.height
+          ? { width: item.width, height: item.height, placeholder: item.placeholder ?? null }
+          : null,
       }
     })
     .filter(Boolean)
@@ -124,6 +128,7 @@ export function generateWordMatchBatch(wordsetId, language = DEFAULT_LANGUAGE, s
     return {
       id: entry.stem,
       image_path: entry.path,
+      image_meta: entry.meta,
       choices: shuffled,
       correct_index: shuffled.indexOf(entry.word),
     }
@@ -160,6 +165,7 @@ export function generateWordMatchHardBatch(language = DEFAULT_LANGUAGE, size = F
     batch.push({
       id: correct.stem,
       image_path: correct.path,
+      image_meta: correct.meta,
       choices: choiceWords,
       correct_index: choiceWords.indexOf(correct.word),
     })
@@ -180,13 +186,13 @@ export function generateImageMatchBatch(wordsetId, language = DEFAULT_LANGUAGE,
       distractorPool,
       Math.min(distractorCount, distractorPool.length)
     )
-    const filenames = [...distractors.map((item) => item.path), entry.path]
-    const shuffled = shuffle(filenames)
+    const options = shuffle([...distractors, entry])
     return {
       id: entry.stem,
       word: entry.word,
-      image_choices: shuffled,
-      correct_index: shuffled.indexOf(entry.path),
+      image_choices: options.map((item) => item.path),
+      choice_meta: options.map((item) => item.meta),
+      correct_index: options.indexOf(entry),
     }
   })
 }
@@ -208,6 +214,7 @@ export function generateFirstLetterBatch(language = DEFAULT_LANGUAGE, size = FAL
     return {
       id: entry.stem,
       image_path: entry.path,
+      image_meta: entry.meta,
       choices: options,
       correct_index: options.indexOf(correctLetter),
     }
@@ -233,12 +240,13 @@ export function generateInverseFirstLetterBatch(language = DEFAULT_LANGUAGE, siz
     const correct = sample(options, 1)[0]
     const distractorPool = pool.filter((entry) => entry.letter !== letter)
     const distractors = sample(distractorPool, Math.min(3, distractorPool.length))
-    const choices = shuffle([...distractors.map((item) => item.path), correct.path])
+    const choices = shuffle([...distractors, correct])
     batch.push({
       id: letter,
       letter,
-      image_choices: choices,
-      correct_index: choices.indexOf(correct.path),
+      image_choices: choices.map((item) => item.path),
+      choice_meta: choices.map((item) => item.meta),
+      correct_index: choices.indexOf(correct),
     })
   }
   return batch
@@ -283,6 +291,7 @@ export function generateWritingGameBatch(wordsetId, language = DEFAULT_LANGUAGE,
     return {
       id: entry.stem,
       image_path: entry.path,
+      image_meta: entry.meta,
       correct_word: correctWord,
       letters: shuffledLetters,
     }
@@ -0,0 +1,29 @@
+"""Conditional requests and precompressed siblings of static assets."""
+import os
+
+from app_backend.assets import etag_matches, precompressed
+
+ETAG = '"3fa2b1c9d0e1f2a3"'
+
+
+def test_etag_matches_whole_tags_only():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"0000000000000000", W/{ETAG}', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches("", ETAG)
+    assert not etag_matches(f'"x{ETAG[1:]}', ETAG)
+    assert not etag_matches(f'"{ETAG}"', ETAG)
+
+
+def test_stale_sibling_is_not_served(tmp_path):
+    (tmp_path / "app.js").write_text("new")
+    (tmp_path / "app.js.gz").write_bytes(b"old")
+    (tmp_path / "app.js.br").write_bytes(b"old")
+    assert precompressed(tmp_path, "app.js", "gzip, br") == ("app.js.br", "br")
+    assert precompressed(tmp_path, "app.js", "gzip") == ("app.js.gz", "gzip")
+    # the source edited after compressing
+    st = (tmp_path / "app.js").stat()
+    os.utime(tmp_path / "app.js.br", ns=(st.st_atime_ns, st.st_mtime_ns - 1))
+    assert precompressed(tmp_path, "app.js", "gzip, br") == ("app.js.gz", "gzip")
+    assert precompressed(tmp_path, "app.js", "br") == ("app.js", None)
+    assert precompressed(tmp_path, "missing.js", "br") == ("missing.js", None)
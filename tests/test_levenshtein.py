@@ -0,0 +1,67 @@
+"""The vectorised Levenshtein helpers must agree with the scalar reference."""
+import random
+
+import pytest
+
+from app_backend.utils import levenshtein, levenshtein_filter, levenshtein_many, levenshtein_matrix
+
+np = pytest.importorskip("numpy")
+
+ALPHABET = "abcdeÄÖÜäöüß"
+
+
+def random_words(rng, n, max_len=9):
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_len))) for _ in range(n)]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
+
+
+def test_levenshtein_reference():
+    assert levenshtein("", "") == 0
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("Bär", "Bar") == 1
+    assert levenshtein("kitten", "sitting") == 3
+
+
+def test_many_matches_scalar(rng):
+    for _ in range(50):
+        word = random_words(rng, 1)[0]
+        candidates = random_words(rng, 40)
+        expected = [levenshtein(word, c) for c in candidates]
+        assert list(levenshtein_many(word, candidates)) == expected
+
+
+def test_many_edge_cases():
+    candidates = ["", "Ä", "Äpfel", "Apfel", "ÄÄÄÄÄÄÄÄÄÄÄÄ"]
+    for word in ("", "Äpfel", "Ü"):
+        assert list(levenshtein_many(word, candidates)) == [levenshtein(word, c) for c in candidates]
+    assert list(levenshtein_many("abc", [""])) == [3]
+
+
+def test_matrix_matches_scalar(rng):
+    words = random_words(rng, 25) + [""]
+    matrix = levenshtein_matrix(words)
+    for i, a in enumerate(words):
+        for j, b in enumerate(words):
+            assert matrix[i][j] == levenshtein(a, b)
+
+
+@pytest.mark.parametrize("min_dist,max_dist,k", [(None, None, None), (2, None, None), (None, 3, None), (1, 4, 5), (3, 3, 2)])
+def test_filter_matches_scalar(rng, min_dist, max_dist, k):
+    for _ in range(20):
+        word = random_words(rng, 1)[0]
+        candidates = random_words(rng, 30)
+        expected = [
+            (c, levenshtein(word, c))
+            for c in candidates
+            if (min_dist is None or levenshtein(word, c) >= min_dist)
+            and (max_dist is None or levenshtein(word, c) <= max_dist)
+        ]
+        # nearest first, ties in input order
+        expected.sort(key=lambda p: p[1])
+        if k is not None:
+            expected = expected[:k]
+        assert levenshtein_filter(word, candidates, min_dist, max_dist, k) == expected
@@ -0,0 +1,45 @@
+"""Distance-filtered question batches skip words without distractors instead of failing."""
+import random
+
+import pytest
+
+from app_backend.catalog import CatalogSnapshot
+from app_backend.questions import QuestionError, next_batch
+from app_backend.similarity import SimilarityIndex
+from app_backend.utils import levenshtein
+
+pytest.importorskip("numpy")
+
+# "Haus" and "Maus" have neighbours within one edit, "Elefant" has none
+STEMS = ["Haus", "Maus", "Laus", "Elefant", "Kuh"]
+
+
+def snapshot_and_index(stems):
+    snapshot = CatalogSnapshot([(f"{s}.jpg", s) for s in stems])
+    return snapshot, SimilarityIndex(snapshot.stems)
+
+
+def test_words_without_distractors_are_skipped():
+    snapshot, index = snapshot_and_index(STEMS)
+    for seed in range(20):
+        batch = next_batch(snapshot, len(STEMS), max_lev=1, similarity=index, rng=random.Random(seed))
+        assert {q["id"] for q in batch} == {"Haus", "Maus", "Laus"}
+        for q in batch:
+            correct = q["choices"][q["correct_index"]]
+            assert len(q["choices"]) == 3
+            assert all(levenshtein(correct, c) <= 1 for c in q["choices"])
+
+
+def test_skipped_words_are_replaced():
+    snapshot, index = snapshot_and_index(STEMS)
+    for seed in range(20):
+        batch = next_batch(snapshot, 2, max_lev=1, similarity=index, rng=random.Random(seed))
+        assert len(batch) == 2
+
+
+def test_empty_batch_raises():
+    snapshot, index = snapshot_and_index(STEMS)
+    with pytest.raises(QuestionError):
+        next_batch(snapshot, 3, lev=10, max_lev=10, similarity=index, rng=random.Random(0))
+    with pytest.raises(QuestionError):
+        next_batch(snapshot, 3, max_len=3, similarity=index, rng=random.Random(0))
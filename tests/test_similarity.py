@@ -0,0 +1,74 @@
+"""The similarity index must find exactly the words a brute-force scan finds."""
+import random
+
+import pytest
+
+from app_backend.similarity import SimilarityIndex, pick_distractors
+from app_backend.utils import levenshtein
+
+pytest.importorskip("numpy")
+
+ALPHABET = "abcdeÄÖÜäöüß"
+RANGES = [(0, 0), (0, 1), (1, 2), (2, 2), (0, 3), (2, 4)]
+
+
+def random_words(rng, n, max_len=8):
+    return list({"".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, max_len))) for _ in range(n)})
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
+
+
+def assert_matches_scan(index, vocab, rng):
+    for word in rng.sample(vocab, 12) + ["", "zz", "äbcdeäbcde"]:
+        for lo, hi in RANGES:
+            assert index.in_range(word, lo, hi) == {w for w in vocab if lo <= levenshtein(word, w) <= hi}
+
+
+def test_in_range_matches_scan(rng):
+    vocab = random_words(rng, 600)
+    index = SimilarityIndex(vocab)
+    assert_matches_scan(index, vocab, rng)
+
+
+def test_sync_updates_changed_buckets(rng):
+    vocab = random_words(rng, 600)
+    index = SimilarityIndex(vocab[:400])
+    index.build()
+    # additions are merged into built buckets, removals rebuild them
+    index.sync(vocab[:500])
+    assert_matches_scan(index, vocab[:500], rng)
+    index.sync(vocab[100:550])
+    assert_matches_scan(index, vocab[100:550], rng)
+    assert len(index) == len(vocab[100:550])
+
+
+def test_sync_keeps_unaffected_cache_entries():
+    index = SimilarityIndex(["abc", "abd", "abcdefgh"])
+    index.in_range("abc", 1, 1)
+    index.in_range("abcdefgh", 0, 1)
+    index.sync(["abc", "abd", "abcdefgh", "abcdefgi"])
+    assert ("abc", 1, 1) in index._cache
+    assert ("abcdefgh", 0, 1) not in index._cache
+    assert index.in_range("abcdefgh", 1, 1) == {"abcdefgi"}
+
+
+def test_pick_distractors_stays_within_max_dist(rng):
+    vocab = random_words(rng, 500)
+    index = SimilarityIndex(vocab)
+    for word in rng.sample(vocab, 50):
+        picked = pick_distractors(word, vocab, 3, index, 1, 1, rng=rng)
+        in_range = [w for w in vocab if levenshtein(word, w) == 1]
+        assert len(picked) == min(3, len(in_range))
+        assert set(picked) <= set(in_range)
+
+
+def test_pick_distractors_respects_allowed(rng):
+    vocab = random_words(rng, 500)
+    index = SimilarityIndex(vocab)
+    pool = [w for w in vocab if len(w) <= 4]
+    for word in rng.sample(pool, 30):
+        picked = pick_distractors(word, pool, 3, index, 1, 3, allowed=frozenset(pool), rng=rng)
+        assert all(len(w) <= 4 and 1 <= levenshtein(word, w) <= 3 for w in picked)
@@ -0,0 +1,76 @@
+"""A row that can never be written must not block the rows queued after it."""
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app_backend import answers
+from app_backend.models import AnswerEvent, Base, TrialResult
+from app_backend.trials import TrialWriter
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def count(session_factory, column):
+    with session_factory() as db:
+        return db.execute(select(func.count(column))).scalar()
+
+
+def trial(wordset_id="set-1", correct=3):
+    return TrialResult(id=str(uuid4()), wordset_id=wordset_id, correct=correct, answered_at=datetime.utcnow())
+
+
+def drain(writer, flushes):
+    written = 0
+    for _ in range(flushes):
+        written += writer.flush()
+    return written
+
+
+def test_failing_trial_is_dropped_after_retries(session_factory):
+    writer = TrialWriter(session_factory, max_retries=3)
+    # NOT NULL violation
+    assert writer.submit([trial(), trial(wordset_id=None), trial()])
+    assert writer.flush() == 0
+    assert writer.submit([trial()])
+    assert drain(writer, 2) == 3
+    assert writer.submit([trial()])
+    assert writer.flush() == 1
+    assert count(session_factory, TrialResult.id) == 4
+    assert writer.flush() == 0
+
+
+def test_full_buffer_rejects_rows(session_factory):
+    writer = TrialWriter(session_factory, max_buffer=2)
+    assert writer.submit([trial(), trial()])
+    assert not writer.submit([trial()])
+    assert writer.flush() == 2
+    assert writer.submit([trial()])
+
+
+def test_failing_answer_is_dropped_after_retries(session_factory, monkeypatch):
+    monkeypatch.setattr(answers, "key_codes", answers.KeyCodes())
+    writer = answers.AnswerWriter(session_factory, max_retries=2)
+
+    def answer(item_id):
+        return SimpleNamespace(
+            wordset_id="set-1", mode="next", item_id=item_id, chosen_index=0, correct=True, latency_ms=900
+        )
+
+    good = answers.new_answer_rows([answer("Haus"), answer("Maus")])
+    # an answer key may not be NULL
+    bad = answers.new_answer_rows([answer(None)])
+    assert writer.submit(good[:1] + bad + good[1:])
+    assert drain(writer, 2) == 2
+    assert writer.submit(answers.new_answer_rows([answer("Laus")]))
+    assert writer.flush() == 1
+    assert count(session_factory, AnswerEvent.id) == 3